@@ -0,0 +1,273 @@
+import asyncio
+import inspect
+import time
+from typing import Any, AsyncIterable, Callable, Iterable, List, Optional, TypeVar, Generic, Union
+from collections import deque
+from itertools import chain
+from operator import itemgetter
+
+from assignment1.producer_consumer import SENTINEL, _print_summary
+
+T = TypeVar("T")
+
+
+# ------------- Async Blocking Queue -------------
+class AsyncBlockingQueue(Generic[T]):
+    """
+    asyncio counterpart of BlockingQueue: same bounded capacity and
+    backpressure, but waiting suspends the coroutine instead of a thread,
+    so thousands of producers/consumers can share one event loop.
+
+    Not thread-safe: touch it from the loop's thread only, or through
+    AsyncQueueBridge.
+    """
+    def __init__(self, max_size: int = 10):
+        if max_size <= 0:
+            raise ValueError("max_size must be greater than 0.")
+
+        self.max_size = max_size
+        self.queue: deque[T] = deque()
+        self.lock = asyncio.Lock()
+        self.not_empty = asyncio.Condition(self.lock)
+        self.not_full = asyncio.Condition(self.lock)
+
+    async def put(self, item: T) -> None:
+        """Put an item into the queue, waiting while full."""
+        async with self.not_full:
+            while len(self.queue) >= self.max_size:
+                await self.not_full.wait()
+
+            self.queue.append(item)
+            self.not_empty.notify()
+
+    async def get(self) -> T:
+        """Remove and return an item from the queue, waiting while empty."""
+        async with self.not_empty:
+            while len(self.queue) == 0:
+                await self.not_empty.wait()
+
+            item = self.queue.popleft()
+            self.not_full.notify()
+
+            return item
+
+    async def put_many(self, items: Iterable[T]) -> None:
+        """Put every item, waiting while full; fills all free space per pass."""
+        items = list(items)
+        done = 0
+
+        async with self.not_full:
+            while done < len(items):
+                while len(self.queue) >= self.max_size:
+                    await self.not_full.wait()
+
+                free = self.max_size - len(self.queue)
+                batch = items[done:done + free]
+                self.queue.extend(batch)
+                done += len(batch)
+
+                self.not_empty.notify(len(batch))
+
+    async def get_many(self, max_items: int, timeout: Optional[float] = None) -> List[T]:
+        """
+        Remove and return up to `max_items` items at once.
+
+        Waits until at least one item is available, or returns [] once
+        `timeout` seconds pass without one.
+        """
+        if max_items <= 0:
+            raise ValueError("max_items must be greater than 0.")
+
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        async with self.not_empty:
+            while len(self.queue) == 0:
+                if deadline is None:
+                    await self.not_empty.wait()
+                else:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        return []
+                    try:
+                        await asyncio.wait_for(self.not_empty.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        # The lock is held again here; the loop re-checks for a late item
+                        pass
+
+            count = min(max_items, len(self.queue))
+            items = [self.queue.popleft() for _ in range(count)]
+            self.not_full.notify(count)
+
+            return items
+
+    def size(self) -> int:
+        """Return current queue length."""
+        return len(self.queue)
+
+
+# ------------- Thread → Async Bridge -------------
+class AsyncQueueBridge(Generic[T]):
+    """
+    Blocking, thread-side view of an AsyncBlockingQueue running on `loop`.
+
+    Each call is scheduled on the loop and the *calling thread* waits for
+    it, so a full queue applies backpressure to the thread without ever
+    blocking the loop. It has the put/put_many/size surface of
+    BlockingQueue, so an existing `Producer` thread can feed async consumers.
+    """
+
+    def __init__(self, queue: AsyncBlockingQueue[T], loop: asyncio.AbstractEventLoop):
+        self.queue = queue
+        self.loop = loop
+
+    def put(self, item: T) -> None:
+        asyncio.run_coroutine_threadsafe(self.queue.put(item), self.loop).result()
+
+    def put_many(self, items: Iterable[T]) -> None:
+        asyncio.run_coroutine_threadsafe(self.queue.put_many(items), self.loop).result()
+
+    def size(self) -> int:
+        return self.queue.size()
+
+
+# ------------- Shared Async Source -------------
+class _AsyncSharedSource:
+    """
+    One iterator over a sync or async `source`, shared by producer coroutines.
+    Async iterators are advanced under a lock (an async generator can't be
+    resumed by two coroutines at once). `tag` works as in SharedSource.
+    """
+
+    def __init__(self, source: Union[Iterable[Any], AsyncIterable[Any]], tag: bool = False):
+        if hasattr(source, "__aiter__"):
+            self._aiterator = source.__aiter__()
+            self._iterator = None
+        else:
+            self._aiterator = None
+            self._iterator = iter(source)
+        self._lock = asyncio.Lock()
+        self.tag = tag
+        self.count = 0
+
+    def __aiter__(self) -> "_AsyncSharedSource":
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._iterator is not None:
+            try:
+                item = next(self._iterator)
+            except StopIteration:
+                raise StopAsyncIteration from None
+        else:
+            async with self._lock:
+                item = await self._aiterator.__anext__()
+
+        seq = self.count
+        self.count += 1
+        return (seq, item) if self.tag else item
+
+
+# ------------- Producer / Consumer Coroutines -------------
+async def _produce(source: _AsyncSharedSource, queue: AsyncBlockingQueue[Any], batch_size: int) -> None:
+    batch: List[Any] = []
+    try:
+        async for item in source:
+            if batch_size == 1:
+                await queue.put(item)
+                continue
+            batch.append(item)
+            if len(batch) >= batch_size:
+                await queue.put_many(batch)
+                batch = []
+    except Exception as e:
+        print(f"[Producer] ERROR: {e!r}")
+    finally:
+        if batch:
+            await queue.put_many(batch)
+
+
+async def _consume(
+    queue: AsyncBlockingQueue[Any],
+    destination: List[Any],
+    batch_size: int,
+    process: Optional[Callable[[Any], Any]],
+    tagged: bool,
+) -> None:
+    while True:
+        items = await queue.get_many(batch_size)
+
+        for pos, entry in enumerate(items):
+            if entry is SENTINEL:
+                # Anything taken after our sentinel belongs to another consumer → put it back
+                if pos + 1 < len(items):
+                    await queue.put_many(items[pos + 1:])
+                return
+
+            seq, item = entry if tagged else (None, entry)
+            if process is not None:
+                try:
+                    item = process(item)
+                    if inspect.isawaitable(item):
+                        item = await item
+                except Exception as e:
+                    print(f"[Consumer] ERROR processing {entry!r}: {e!r}")
+                    continue
+
+            destination.append((seq, item) if tagged else item)
+
+
+async def async_run_pipeline(
+    source: Union[Iterable[T], AsyncIterable[T]],
+    queue_size: int = 10,
+    batch_size: int = 1,
+    producers: int = 1,
+    consumers: int = 1,
+    process: Optional[Callable[[T], Any]] = None,
+    ordered: bool = True,
+) -> List[Any]:
+    """
+    asyncio version of run_pipeline: `producers` and `consumers` are
+    coroutines on the running loop, connected by an AsyncBlockingQueue.
+
+    `source` may be a plain or async iterable; `process` may be a plain
+    function or a coroutine function. Shutdown, batching, error handling
+    and `ordered` behave as in run_pipeline.
+    """
+    if producers <= 0 or consumers <= 0:
+        raise ValueError("producers and consumers must be greater than 0.")
+    if batch_size <= 0:
+        raise ValueError("batch_size must be greater than 0.")
+
+    tag = ordered and (producers > 1 or consumers > 1)
+    shared = _AsyncSharedSource(source, tag=tag)
+    queue: AsyncBlockingQueue[Any] = AsyncBlockingQueue(max_size=queue_size)
+    outputs: List[List[Any]] = [[] for _ in range(consumers)]
+
+    start = time.time()
+    consumer_tasks = [
+        asyncio.create_task(_consume(queue, out, batch_size, process, tag))
+        for out in outputs
+    ]
+
+    await asyncio.gather(*(_produce(shared, queue, batch_size) for _ in range(producers)))
+    await queue.put_many([SENTINEL] * consumers)
+    await asyncio.gather(*consumer_tasks)
+    end = time.time()
+
+    if tag:
+        destination = [result for _, result in sorted(chain(*outputs), key=itemgetter(0))]
+    else:
+        destination = list(chain(*outputs))
+
+    _print_summary(shared.count, len(destination), end - start)
+
+    return destination
+
+
+if __name__ == "__main__":
+    async def slow_double(x: int) -> int:
+        await asyncio.sleep(0.01)
+        return x * 2
+
+    output = asyncio.run(async_run_pipeline(range(1000), queue_size=50, consumers=500, process=slow_double))
+    print("\nFirst items:", output[:5])
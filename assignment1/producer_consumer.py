@@ -1,12 +1,43 @@
+import logging
+import math
+import multiprocessing
 import threading
 import time
-from typing import Any, List, TypeVar, Generic
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar, Generic, Union
 from collections import deque
+from dataclasses import dataclass, field
+from itertools import chain
+from operator import itemgetter
+from queue import Empty, Full
 
 # ------------- Sentinel: unique object that cannot collide with real data  -------------
 SENTINEL = object()
 T = TypeVar("T")
 
+logger = logging.getLogger(__name__)
+
+
+# ------------- Queue Exceptions -------------
+class QueueFull(Full):
+    """ put() timed out (or try_put() found no space). """
+
+
+class QueueEmpty(Empty):
+    """ get() timed out with nothing to take. """
+
+
+class QueueClosed(Exception):
+    """ put() on a closed queue, or get() on a closed queue that has been drained. """
+
+
+def _deadline(timeout: Optional[float]) -> Optional[float]:
+    if timeout is None:
+        return None
+    if timeout < 0:
+        raise ValueError("timeout must be non-negative.")
+    return time.monotonic() + timeout
+
+
 # ------------- Blocking Queue Implementation -------------
 class BlockingQueue(Generic[T]):
     """
@@ -24,30 +55,234 @@ class BlockingQueue(Generic[T]):
         self.lock = threading.Lock()
         self.not_empty = threading.Condition(self.lock)
         self.not_full = threading.Condition(self.lock)
+        self.closed = False
 
-    def put(self, item: T) -> None:
-        """Put an item into the queue, blocking if full."""
+        # Time spent parked in put/get waits (only touched on the slow path)
+        self.put_wait_seconds = 0.0
+        self.get_wait_seconds = 0.0
+
+        # Watermark callbacks (see set_watermarks); off by default
+        self._watermarks = False
+        self._on_high: Optional[Callable[[int], Any]] = None
+        self._on_low: Optional[Callable[[int], Any]] = None
+        self._high_fraction, self._low_fraction = 0.8, 0.2
+        self._above_high = False
+        self._set_marks()
+
+    def _set_marks(self) -> None:
+        self._high_mark = max(1, math.ceil(self.max_size * self._high_fraction))
+        self._low_mark = int(self.max_size * self._low_fraction)
+
+    def set_watermarks(
+        self,
+        on_high: Optional[Callable[[int], Any]] = None,
+        on_low: Optional[Callable[[int], Any]] = None,
+        high: float = 0.8,
+        low: float = 0.2,
+    ) -> None:
+        """
+        Call on_high(depth) when the depth reaches `high` * max_size, then
+        on_low(depth) once it falls back to `low` * max_size (and so on).
+        Marks are fractions, so they follow resize(). Callbacks run in the
+        putting / getting thread, outside the lock, and should be quick.
+        """
+        if not 0 <= low < high <= 1:
+            raise ValueError("Watermarks need 0 <= low < high <= 1.")
+
+        with self.lock:
+            self._on_high, self._on_low = on_high, on_low
+            self._high_fraction, self._low_fraction = high, low
+            self._watermarks = on_high is not None or on_low is not None
+            self._set_marks()
+
+    def _crossed_watermark(self) -> Optional[Tuple[Optional[Callable[[int], Any]], int]]:
+        """ (callback, depth) if the last change crossed a watermark; lock held. """
+        depth = len(self.queue)
+        if not self._above_high:
+            if depth >= self._high_mark:
+                self._above_high = True
+                return self._on_high, depth
+        elif depth <= self._low_mark:
+            self._above_high = False
+            return self._on_low, depth
+        return None
+
+    @staticmethod
+    def _fire(crossed: Optional[Tuple[Optional[Callable[[int], Any]], int]]) -> None:
+        if crossed is not None and crossed[0] is not None:
+            crossed[0](crossed[1])
+
+    def resize(self, max_size: int) -> None:
+        """
+        Change the capacity in place. Growing wakes blocked producers;
+        shrinking never drops items, puts just wait until the depth is
+        back under the new size.
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be greater than 0.")
+
+        with self.lock:
+            grew = max_size > self.max_size
+            self.max_size = max_size
+            self._set_marks()
+            if grew:
+                self.not_full.notify_all()
+
+    def _wait(self, condition: threading.Condition, deadline: Optional[float]) -> bool:
+        """ One wait on `condition` (lock held) bounded by `deadline`; False once it has passed. """
+        waited = time.perf_counter()
+        if deadline is None:
+            condition.wait()
+        else:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            condition.wait(remaining)
+
+        if condition is self.not_full:
+            self.put_wait_seconds += time.perf_counter() - waited
+        else:
+            self.get_wait_seconds += time.perf_counter() - waited
+        return True
+
+    def put(self, item: T, timeout: Optional[float] = None) -> None:
+        """
+        Put an item into the queue, blocking if full.
+
+        Raises QueueFull if `timeout` seconds pass without free space, and
+        QueueClosed if the queue is (or gets) closed.
+        """
+        deadline = None if timeout is None else _deadline(timeout)
         with self.not_full:
-            while len(self.queue) >= self.max_size:
-                self.not_full.wait()
+            while True:
+                if self.closed:
+                    raise QueueClosed("put() on a closed queue.")
+                if len(self.queue) < self.max_size:
+                    break
+                if not self._wait(self.not_full, deadline):
+                    raise QueueFull(f"Queue still full after {timeout}s.")
 
             self.queue.append(item)
 
             # Wake exactly ONE waiting consumer
             self.not_empty.notify()
+            crossed = self._crossed_watermark() if self._watermarks else None
 
-    def get(self) -> T:
-        """Remove and return an item from the queue, blocking if empty."""
+        if crossed is not None:
+            self._fire(crossed)
+
+    def get(self, timeout: Optional[float] = None) -> T:
+        """
+        Remove and return an item from the queue, blocking if empty.
+
+        Raises QueueEmpty if `timeout` seconds pass without an item. A closed
+        queue still hands out what it holds, then raises QueueClosed.
+        """
+        deadline = None if timeout is None else _deadline(timeout)
         with self.not_empty:
             while len(self.queue) == 0:
-                self.not_empty.wait()
+                if self.closed:
+                    raise QueueClosed("get() on a closed, drained queue.")
+                if not self._wait(self.not_empty, deadline):
+                    raise QueueEmpty(f"Queue still empty after {timeout}s.")
 
             item = self.queue.popleft()  # O(1)
 
             # Wake ONE waiting producer
             self.not_full.notify()
+            crossed = self._crossed_watermark() if self._watermarks else None
+
+        if crossed is not None:
+            self._fire(crossed)
+        return item
+
+    def try_put(self, item: T) -> bool:
+        """Put without blocking; False if the queue is full (load shedding)."""
+        try:
+            self.put(item, timeout=0)
+            return True
+        except QueueFull:
+            return False
+
+    def try_get(self, default: Any = None) -> Any:
+        """Get without blocking; `default` if the queue is empty."""
+        try:
+            return self.get(timeout=0)
+        except QueueEmpty:
+            return default
+
+    def close(self) -> None:
+        """
+        Close the queue in O(1): wake every waiter, fail all further puts
+        with QueueClosed, and let gets drain what is left before they do too.
+        """
+        with self.lock:
+            self.closed = True
+            self.not_full.notify_all()
+            self.not_empty.notify_all()
+
+    def put_many(self, items: Iterable[T]) -> None:
+        """
+        Put every item, blocking while full.
+
+        Each pass under the lock moves as many items as there is free space,
+        and wakes as many consumers as items were added. Raises QueueClosed
+        if the queue is closed first (items already moved stay queued).
+        """
+        items = list(items)
+        done = 0
+        crossed = []
+
+        with self.not_full:
+            while done < len(items):
+                while True:
+                    if self.closed:
+                        raise QueueClosed("put_many() on a closed queue.")
+                    if len(self.queue) < self.max_size:
+                        break
+                    self._wait(self.not_full, None)
+
+                free = self.max_size - len(self.queue)
+                batch = items[done:done + free]
+                self.queue.extend(batch)
+                done += len(batch)
+
+                self.not_empty.notify(len(batch))
+                if self._watermarks:
+                    crossed.append(self._crossed_watermark())
+
+        for event in crossed:
+            self._fire(event)
 
-            return item
+    def get_many(self, max_items: int, timeout: Optional[float] = None) -> List[T]:
+        """
+        Remove and return up to `max_items` items in one lock acquisition.
+
+        Blocks until at least one item is available, or returns [] once
+        `timeout` seconds pass without one. Raises QueueClosed once a closed
+        queue is drained.
+        """
+        if max_items <= 0:
+            raise ValueError("max_items must be greater than 0.")
+
+        deadline = None if timeout is None else _deadline(timeout)
+        with self.not_empty:
+            while len(self.queue) == 0:
+                if self.closed:
+                    raise QueueClosed("get_many() on a closed, drained queue.")
+                if not self._wait(self.not_empty, deadline):
+                    return []
+
+            count = min(max_items, len(self.queue))
+            items = [self.queue.popleft() for _ in range(count)]
+
+            # Wake as many producers as slots were freed
+            self.not_full.notify(count)
+            crossed = self._crossed_watermark() if self._watermarks else None
+
+        if crossed is not None:
+            self._fire(crossed)
+        return items
 
     def size(self) -> int:
         """Return current queue length."""
@@ -55,60 +290,893 @@ class BlockingQueue(Generic[T]):
             return len(self.queue)
 
 
+# ------------- Priority (Multi-Lane) Blocking Queue -------------
+class _LaneBuffer:
+    """
+    deque-shaped set of FIFO lanes, so BlockingQueue's wait/notify logic
+    runs on it unchanged: append((lane, item)), popleft() → item.
+
+    Without `weights` the lowest non-empty lane is always served first.
+    With them, lane i gets up to weights[i] consecutive turns before the
+    next non-empty lane, so bulk lanes can't starve. The module SENTINEL
+    waits in its own lane until every other lane is empty.
+    """
+    __slots__ = ("lanes", "weights", "sentinels", "length", "current", "turns")
+
+    def __init__(self, lanes: int, weights: Optional[List[int]]):
+        self.lanes: List[deque] = [deque() for _ in range(lanes)]
+        self.weights = weights
+        self.sentinels: deque = deque()
+        self.length = 0
+        self.current = 0
+        self.turns = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def append(self, entry: Tuple[int, Any]) -> None:
+        lane, item = entry
+        (self.sentinels if item is SENTINEL else self.lanes[lane]).append(item)
+        self.length += 1
+
+    def extend(self, entries: Iterable[Tuple[int, Any]]) -> None:
+        for entry in entries:
+            self.append(entry)
+
+    def popleft(self) -> Any:
+        self.length -= 1
+        lanes = self.lanes
+
+        if self.weights is None:
+            for lane in lanes:
+                if lane:
+                    return lane.popleft()
+            return self.sentinels.popleft()
+
+        # Weighted round robin: stay on the current lane while it has turns left
+        current = self.current
+        if self.turns < self.weights[current] and lanes[current]:
+            self.turns += 1
+            return lanes[current].popleft()
+        for step in range(1, len(lanes) + 1):
+            lane = (current + step) % len(lanes)
+            if lanes[lane]:
+                self.current, self.turns = lane, 1
+                return lanes[lane].popleft()
+        return self.sentinels.popleft()
+
+
+class PriorityBlockingQueue(BlockingQueue[T]):
+    """
+    BlockingQueue with `lanes` FIFO lanes; priority = lane index, 0 most
+    urgent. Capacity (shared by all lanes), blocking, timeouts, close(),
+    resize() and watermarks are inherited, and every operation stays O(1).
+
+    Priority comes from the `priority=` argument of put / put_many /
+    try_put, else `priority_of(item)`, else `default_priority`. Lanes are
+    strict by default; `weights` (turns per lane, e.g. [8, 1]) switches to
+    weighted round robin, which bounds how long an urgent item waits behind
+    bulk (one bulk turn) without starving the bulk lane.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10,
+        lanes: int = 2,
+        weights: Optional[List[int]] = None,
+        priority_of: Optional[Callable[[T], int]] = None,
+        default_priority: int = 0,
+    ):
+        super().__init__(max_size)
+        if lanes <= 0:
+            raise ValueError("lanes must be greater than 0.")
+        if weights is not None and (len(weights) != lanes or min(weights) <= 0):
+            raise ValueError("weights needs one positive weight per lane.")
+        if not 0 <= default_priority < lanes:
+            raise ValueError("default_priority must be a lane index.")
+
+        self.queue = _LaneBuffer(lanes, weights)  # type: ignore[assignment]
+        self.lanes = lanes
+        self.priority_of = priority_of
+        self.default_priority = default_priority
+
+    def _lane(self, item: T, priority: Optional[int]) -> int:
+        if item is SENTINEL:
+            return 0  # parked in its own lane by _LaneBuffer; never ranked
+        if priority is None:
+            priority = self.priority_of(item) if self.priority_of is not None else self.default_priority
+        if not 0 <= priority < self.lanes:
+            raise ValueError(f"priority must be a lane index in [0, {self.lanes}), got {priority!r}.")
+        return priority
+
+    def put(self, item: T, timeout: Optional[float] = None, priority: Optional[int] = None) -> None:
+        super().put((self._lane(item, priority), item), timeout)
+
+    def try_put(self, item: T, priority: Optional[int] = None) -> bool:
+        try:
+            self.put(item, timeout=0, priority=priority)
+            return True
+        except QueueFull:
+            return False
+
+    def put_many(self, items: Iterable[T], priority: Optional[int] = None) -> None:
+        super().put_many([(self._lane(item, priority), item) for item in items])
+
+    def lane_sizes(self) -> List[int]:
+        """Current length of each lane."""
+        with self.lock:
+            return [len(lane) for lane in self.queue.lanes]
+
+
+# ------------- SPSC Ring Buffer -------------
+class RingBufferQueue(Generic[T]):
+    """
+    Bounded queue for exactly ONE producer thread and ONE consumer thread.
+
+    Items live in a preallocated slot list. `_tail` is written only by the
+    producer and `_head` only by the consumer, so the fast path (neither full
+    nor empty) takes no lock: a slot store plus one index update, both atomic
+    under the GIL. A side parks on the condition only when the queue is full
+    (producer) or empty (consumer), after announcing itself through a waiting
+    flag; the other side only touches the lock when it sees that flag.
+    """
+
+    def __init__(self, max_size: int = 10):
+        if max_size <= 0:
+            raise ValueError("max_size must be greater than 0.")
+
+        self.max_size = max_size
+        self._slots: List[Any] = [None] * max_size
+        self._head = 0  # next slot to read  (consumer-owned)
+        self._tail = 0  # next slot to write (producer-owned)
+        self._cond = threading.Condition(threading.Lock())
+        self._producer_waiting = False
+        self._consumer_waiting = False
+
+        # Time spent parked (slow path only), as in BlockingQueue
+        self.put_wait_seconds = 0.0
+        self.get_wait_seconds = 0.0
+
+    # -- parking (slow path) --
+    # A waiter raises its flag BEFORE re-checking the indices; the other side
+    # publishes its index BEFORE reading the flag. So either the waiter sees
+    # the new index, or the other side sees the flag and notifies.
+    def _wait_for_space(self) -> None:
+        with self._cond:
+            while True:
+                self._producer_waiting = True
+                if self._tail - self._head < self.max_size:
+                    break
+                waited = time.perf_counter()
+                self._cond.wait()
+                self.put_wait_seconds += time.perf_counter() - waited
+            self._producer_waiting = False
+
+    def _wait_for_item(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            try:
+                while True:
+                    self._consumer_waiting = True
+                    if self._tail != self._head:
+                        return True
+                    waited = time.perf_counter()
+                    if deadline is None:
+                        self._cond.wait()
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        self._cond.wait(remaining)
+                    self.get_wait_seconds += time.perf_counter() - waited
+            finally:
+                self._consumer_waiting = False
+
+    def _wake(self) -> None:
+        # The waker clears both flags, so a parked side costs one notify, not one per operation
+        with self._cond:
+            self._producer_waiting = self._consumer_waiting = False
+            self._cond.notify()
+
+    # -- producer side --
+    def put(self, item: T) -> None:
+        """Put an item, parking only while the buffer is full."""
+        tail = self._tail
+        if tail - self._head >= self.max_size:
+            self._wait_for_space()
+
+        self._slots[tail % self.max_size] = item
+        self._tail = tail + 1
+        if self._consumer_waiting:
+            self._wake()
+
+    def put_many(self, items: Iterable[T]) -> None:
+        """Put every item; each pass fills all free slots before publishing them."""
+        items = list(items)
+        done = 0
+        slots, max_size = self._slots, self.max_size
+
+        while done < len(items):
+            tail = self._tail
+            free = max_size - (tail - self._head)
+            if free <= 0:
+                self._wait_for_space()
+                continue
+
+            count = min(free, len(items) - done)
+            for offset in range(count):
+                slots[(tail + offset) % max_size] = items[done + offset]
+            done += count
+            self._tail = tail + count
+            if self._consumer_waiting:
+                self._wake()
+
+    # -- consumer side --
+    def get(self) -> T:
+        """Remove and return the next item, parking only while the buffer is empty."""
+        head = self._head
+        if self._tail == head:
+            self._wait_for_item()
+
+        index = head % self.max_size
+        item = self._slots[index]
+        self._slots[index] = None  # don't keep consumed items alive
+        self._head = head + 1
+        if self._producer_waiting:
+            self._wake()
+        return item
+
+    def get_many(self, max_items: int, timeout: Optional[float] = None) -> List[T]:
+        """Remove and return up to `max_items` items; [] if `timeout` passes with none."""
+        if max_items <= 0:
+            raise ValueError("max_items must be greater than 0.")
+
+        head = self._head
+        if self._tail == head and not self._wait_for_item(timeout):
+            return []
+
+        count = min(max_items, self._tail - head)
+        slots, max_size = self._slots, self.max_size
+        items = []
+        for offset in range(count):
+            index = (head + offset) % max_size
+            items.append(slots[index])
+            slots[index] = None
+        self._head = head + count
+        if self._producer_waiting:
+            self._wake()
+        return items
+
+    def size(self) -> int:
+        """Return current queue length (a snapshot; either side may move it)."""
+        return self._tail - self._head
+
+
+# ------------- Pipeline Metrics -------------
+class LatencyHistogram:
+    """
+    Latency histogram with power-of-two buckets: bucket k counts latencies in
+    [2**(k-1), 2**k) nanoseconds, so recording is a bit_length() and an add.
+    Each consumer records into its own instance; merge() combines them.
+    """
+    BUCKETS = 64
+
+    def __init__(self):
+        self.buckets = [0] * self.BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns: int) -> None:
+        self.buckets[min(max(ns, 0).bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for k, n in enumerate(other.buckets):
+            self.buckets[k] += n
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def percentile(self, p: float) -> int:
+        """ Upper bound (ns) of the bucket holding the p-th percentile; 0 when empty. """
+        if not 0 < p <= 100:
+            raise ValueError("p must be in (0, 100].")
+        if self.count == 0:
+            return 0
+
+        rank = p / 100 * self.count
+        seen = 0
+        for k, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(1 << k, self.max_ns)
+        return self.max_ns
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_us": self.total_ns / self.count / 1000 if self.count else 0.0,
+            "p50_us": self.percentile(50) / 1000,
+            "p99_us": self.percentile(99) / 1000,
+            "max_us": self.max_ns / 1000,
+        }
+
+
+@dataclass
+class PipelineStats:
+    """
+    What a run_pipeline call did. Counters and queue wait times are always
+    filled; `latency` (produce → consume, per item) needs metrics=True and
+    `depth_samples` needs sample_interval, `capacity_history` needs adaptive.
+    """
+    produced: int = 0
+    consumed: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    put_wait_seconds: float = 0.0
+    get_wait_seconds: float = 0.0
+    depth_samples: List[int] = field(default_factory=list)
+    latency: Optional[LatencyHistogram] = None
+    capacity_history: List[int] = field(default_factory=list)
+
+    @property
+    def items_per_sec(self) -> float:
+        return self.consumed / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "produced": self.produced,
+            "consumed": self.consumed,
+            "failed": self.failed,
+            "elapsed": self.elapsed,
+            "items_per_sec": self.items_per_sec,
+            "put_wait_seconds": self.put_wait_seconds,
+            "get_wait_seconds": self.get_wait_seconds,
+            "depth_samples": list(self.depth_samples),
+            "latency": self.latency.as_dict() if self.latency is not None else None,
+            "capacity_history": list(self.capacity_history),
+        }
+
+
+class PipelineResult(list):
+    """ The destination list returned by run_pipeline, with its PipelineStats attached. """
+
+    def __init__(self, items: Iterable[Any], stats: PipelineStats):
+        super().__init__(items)
+        self.stats = stats
+
+
+class _PipelineSampler(threading.Thread):
+    """ Samples queue depth every `interval` seconds into `stats` and logs a progress line. """
+
+    def __init__(self, queue: Any, interval: float, stats: PipelineStats, progress: Callable[[], Tuple[int, int]]):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.interval = interval
+        self.stats = stats
+        self.progress = progress
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            depth = self.queue.size()
+            self.stats.depth_samples.append(depth)
+            produced, consumed = self.progress()
+            logger.info("[Pipeline] produced=%d consumed=%d queue_depth=%d", produced, consumed, depth)
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+
+# ------------- Adaptive Capacity -------------
+class AdaptiveCapacity(threading.Thread):
+    """
+    Resizes a BlockingQueue between `min_size` and `max_size` every
+    `interval` seconds, from the last window's wait times and item rate:
+
+      - producers AND consumers each blocked for more than `stall` of the
+        window → the buffer is too small to absorb bursts: double it;
+      - only producers blocked (queue pinned full, consumers never wait)
+        → the backlog is just memory: halve it;
+      - a halving that cost more than 10% of the item rate is undone, and
+        the capacity never goes below that size again.
+
+    So capacity climbs until the two sides stop stalling each other and
+    settles at the smallest size that keeps the rate. `history` records
+    every capacity, starting with the initial one.
+    """
+
+    def __init__(
+        self,
+        queue: BlockingQueue[Any],
+        min_size: int,
+        max_size: int,
+        progress: Callable[[], int],
+        producers: int = 1,
+        consumers: int = 1,
+        interval: float = 0.05,
+        stall: float = 0.05,
+    ):
+        super().__init__(daemon=True)
+        if not 0 < min_size <= max_size:
+            raise ValueError("Adaptive bounds need 0 < min_size <= max_size.")
+        if interval <= 0:
+            raise ValueError("interval must be greater than 0.")
+
+        self.queue = queue
+        self.min_size = min_size
+        self.max_size = max_size
+        self.progress = progress
+        self.producers = producers
+        self.consumers = consumers
+        self.interval = interval
+        self.stall = stall
+        self._pending_shrink: Optional[Tuple[int, float]] = None
+        self._done = threading.Event()
+
+        queue.resize(min(max(queue.max_size, min_size), max_size))
+        self.history = [queue.max_size]
+
+    def run(self):
+        queue = self.queue
+        last_put, last_get = queue.put_wait_seconds, queue.get_wait_seconds
+        last_count, last_time = self.progress(), time.perf_counter()
+
+        while not self._done.wait(self.interval):
+            now, count = time.perf_counter(), self.progress()
+            span = now - last_time
+            self.step(
+                (queue.put_wait_seconds - last_put) / (span * self.producers),
+                (queue.get_wait_seconds - last_get) / (span * self.consumers),
+                (count - last_count) / span,
+            )
+            last_put, last_get = queue.put_wait_seconds, queue.get_wait_seconds
+            last_count, last_time = count, now
+
+    def step(self, put_wait: float, get_wait: float, rate: float) -> int:
+        """
+        One control decision from a window's wait fractions (0..1 per
+        thread) and item rate; returns the new capacity.
+        """
+        size = target = self.queue.max_size
+
+        if self._pending_shrink is not None:
+            before, rate_before = self._pending_shrink
+            self._pending_shrink = None
+            if rate < 0.9 * rate_before:
+                self.min_size = target = before
+
+        if target == size:
+            if put_wait > self.stall and get_wait > self.stall:
+                target = min(size * 2, self.max_size)
+            elif put_wait > self.stall and get_wait <= self.stall / 10:
+                target = max(size // 2, self.min_size)
+                if target != size:
+                    self._pending_shrink = (size, rate)
+
+        if target != size:
+            self.queue.resize(target)
+            self.history.append(target)
+        return target
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+
 # ------------- Producer Implementation -------------
 class Producer(threading.Thread):
     """
     Producer thread: Reads from a source and places items into the blocking queue.
+
+    `source` can be any iterable (list, generator, open file, csv reader);
+    it is consumed lazily, so only queue capacity is held in memory.
     """
 
-    def __init__(self, source: List[T], queue: BlockingQueue[T], sentinel: Any):
+    def __init__(
+        self,
+        source: Iterable[T],
+        queue: BlockingQueue[T],
+        sentinel: Any,
+        batch_size: int = 1,
+        sentinels: int = 1,
+    ):
+        """ `sentinels`: how many shutdown signals to send (one per consumer; 0 = the caller sends them). """
         super().__init__()
+        if batch_size <= 0:
+            raise ValueError("batch_size must be greater than 0.")
+
         self.source = source
         self.queue = queue
         self.sentinel = sentinel
+        self.batch_size = batch_size
+        self.sentinels = sentinels
+        # Exception that ended the source early, for the caller to re-raise after join()
+        self.error: Optional[Exception] = None
 
     def run(self):
         """ try/finally for sending sentinel even on failure. """
+        if self.batch_size > 1:
+            return self._run_batched()
+
         try:
+            put = self.queue.put
             for item in self.source:
-                self.queue.put(item)
-                print(f"[Producer] Produced: {item} | Queue size: {self.queue.size()}")
+                put(item)
+        except QueueClosed:
+            # Closed under us → shutdown, not an error
+            pass
         except Exception as e:
+            self.error = e
             print(f"[Producer] ERROR: {e!r}")
         finally:
             # Always send shutdown signal
-            self.queue.put(self.sentinel)
-            print("[Producer] Sentinel sent.")
+            self._send_sentinels()
+
+    def _run_batched(self):
+        """ Same contract as run(), but items go out `batch_size` at a time via put_many. """
+        batch: List[T] = []
+        try:
+            for item in self.source:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self._flush(batch)
+                    batch = []
+        except QueueClosed:
+            batch = []
+        except Exception as e:
+            self.error = e
+            print(f"[Producer] ERROR: {e!r}")
+        finally:
+            # Items read before a failure still go out, followed by the shutdown signal
+            self._flush(batch)
+            self._send_sentinels()
+
+    def _send_sentinels(self) -> None:
+        try:
+            for _ in range(self.sentinels):
+                self.queue.put(self.sentinel)
+                print("[Producer] Sentinel sent.")
+        except QueueClosed:
+            # close() already woke every consumer
+            pass
+
+    def _flush(self, batch: List[T]) -> None:
+        if batch:
+            try:
+                self.queue.put_many(batch)
+            except QueueClosed:
+                pass
 
 
 # ------------- Consumer Implementation -------------
 class Consumer(threading.Thread):
     """
     Consumer thread: Retrieves items from queue and stores them in destination list.
+
+    `destination` may instead be a sink callable, called once per item
+    (e.g. a Reducer, or an aggregator's update method), so nothing piles
+    up in memory.
     """
 
-    def __init__(self, queue: BlockingQueue[T], destination: List[T], sentinel: Any):
+    def __init__(
+        self,
+        queue: BlockingQueue[T],
+        destination: Union[List[T], Callable[[Any], Any]],
+        sentinel: Any,
+        batch_size: int = 1,
+        process: Optional[Callable[[T], Any]] = None,
+        latency: Optional[LatencyHistogram] = None,
+    ):
+        """
+        `process`: optional per-item function; its result is stored instead of the item.
+        `latency`: when given, items arrive as (enqueue_ns, item) and the wait is recorded here.
+        """
         super().__init__()
+        if batch_size <= 0:
+            raise ValueError("batch_size must be greater than 0.")
+
         self.queue = queue
         self.destination = destination
+        self._emit = destination if callable(destination) else destination.append
         self.sentinel = sentinel
+        self.batch_size = batch_size
+        self.process = process
+        self.latency = latency
+        self.failed = 0
 
     def run(self):
+        if self.batch_size > 1:
+            return self._run_batched()
+
         while True:
-            item = self.queue.get()
+            try:
+                item = self.queue.get()
+            except QueueClosed:
+                # Closed and drained → same as a sentinel
+                break
 
             # Sentinel → graceful shutdown
             if item is self.sentinel:
                 print("[Consumer] Received sentinel. Exiting.")
                 break
 
-            self.destination.append(item)
-            print(f"[Consumer] Consumed: {item} | Queue size: {self.queue.size()}")
+            self._handle(item)
+
+    def _run_batched(self):
+        while True:
+            try:
+                items = self.queue.get_many(self.batch_size)
+            except QueueClosed:
+                return
+
+            for pos, item in enumerate(items):
+                if item is self.sentinel:
+                    # Anything taken after our sentinel belongs to someone else → put it back
+                    if pos + 1 < len(items):
+                        self._put_back(items[pos + 1:])
+                    print("[Consumer] Received sentinel. Exiting.")
+                    return
+
+                self._handle(item)
+
+    def _put_back(self, items: List[Any]) -> None:
+        try:
+            self.queue.put_many(items)
+        except QueueClosed:
+            # Nobody can take them back off a closed queue → finish them here
+            for item in items:
+                if item is not self.sentinel:
+                    self._handle(item)
+
+    def _handle(self, item: T) -> None:
+        if self.latency is not None:
+            sent, item = item
+            self.latency.record(time.perf_counter_ns() - sent)
 
+        if self.process is not None:
+            try:
+                item = self.process(item)
+            except Exception as e:
+                # A failing item must not kill the consumer: producers would block on a full queue
+                self.failed += 1
+                print(f"[Consumer] ERROR processing {item!r}: {e!r}")
+                return
 
-def run_pipeline(source: List[T], queue_size: int = 10) -> List[T]:
+        self._emit(item)
+
+
+# ------------- Reducer Sink -------------
+class Reducer(Generic[T]):
+    """
+    Consumer sink that folds items into `value` as fn(value, item), keeping
+    O(1) memory. Not thread-safe: give each consumer its own and combine.
+    """
+
+    def __init__(self, fn: Callable[[Any, T], Any], initial: Any):
+        self.fn = fn
+        self.value = initial
+
+    def __call__(self, item: T) -> None:
+        self.value = self.fn(self.value, item)
+
+
+# ------------- Shared Source for Multiple Producers -------------
+class SharedSource(Generic[T]):
+    """
+    Thread-safe iterator over one source, shared by several producers.
+
+    With `tag=True` every item comes out as (sequence_number, item) so the
+    original order can be restored after parallel consumption. With
+    `timestamps=True` that entry is wrapped once more as (perf_counter_ns, entry)
+    for latency tracking.
+    """
+
+    def __init__(self, source: Iterable[T], tag: bool = False, timestamps: bool = False):
+        self._iterator = iter(source)
+        self._lock = threading.Lock()
+        self.tag = tag
+        self.timestamps = timestamps
+        self.count = 0
+
+    def __iter__(self) -> Iterator[Any]:
+        return self
+
+    def __next__(self) -> Any:
+        with self._lock:
+            item = next(self._iterator)
+            seq = self.count
+            self.count += 1
+        entry = (seq, item) if self.tag else item
+        return (time.perf_counter_ns(), entry) if self.timestamps else entry
+
+
+# ------------- Process Backend -------------
+def _process_worker(tasks, results, process: Optional[Callable[[Any], Any]], tagged: bool) -> None:
+    """
+    Consumer process: takes batches from `tasks` until it gets None (its
+    sentinel), sends each processed batch to `results`, then a final None.
+    """
+    while True:
+        batch = tasks.get()
+        if batch is None:
+            break
+
+        out = []
+        for entry in batch:
+            seq, item = entry if tagged else (None, entry)
+            try:
+                result = process(item) if process is not None else item
+            except Exception as e:
+                print(f"[Consumer] ERROR processing {item!r}: {e!r}")
+                continue
+            out.append((seq, result) if tagged else result)
+        results.put(out)
+
+    results.put(None)
+
+
+def _run_process_pipeline(
+    shared: "SharedSource[T]",
+    queue_size: int,
+    batch_size: int,
+    producers: int,
+    consumers: int,
+    process: Optional[Callable[[T], Any]],
+) -> List[Any]:
+    """
+    Producer threads batch items into a bounded multiprocessing queue that
+    `consumers` worker processes drain, so CPU-bound `process` work runs
+    outside the GIL. Capacity stays ~`queue_size` items (queue_size //
+    batch_size batches, at least one) and each worker gets a None sentinel
+    after the last producer is done. Items and `process` must be picklable
+    where processes are spawned rather than forked.
+    """
+    ctx = multiprocessing.get_context()
+    tasks = ctx.Queue(maxsize=max(1, queue_size // batch_size))
+    results = ctx.Queue()
+
+    workers = [
+        ctx.Process(target=_process_worker, args=(tasks, results, process, shared.tag), daemon=True)
+        for _ in range(consumers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    failed = threading.Event()
+
+    def put(obj: Any) -> bool:
+        """ Blocking put that gives up (returns False) once the pipeline has failed. """
+        while not failed.is_set():
+            try:
+                tasks.put(obj, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce() -> None:
+        batch: List[Any] = []
+        try:
+            for item in shared:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    if not put(batch):
+                        return
+                    batch = []
+        except Exception as e:
+            print(f"[Producer] ERROR: {e!r}")
+        finally:
+            if batch:
+                put(batch)
+
+    producer_threads = [threading.Thread(target=produce) for _ in range(producers)]
+
+    def feed_sentinels() -> None:
+        for thread in producer_threads:
+            thread.join()
+        for _ in workers:
+            put(None)
+
+    feeder = threading.Thread(target=feed_sentinels)
+    for thread in producer_threads + [feeder]:
+        thread.start()
+
+    # Collect while producing: a worker can't exit while its output is still buffered,
+    # and a worker that dies must not leave us waiting forever
+    collected: List[Any] = []
+    finished = 0
+    try:
+        while finished < len(workers):
+            try:
+                batch = results.get(timeout=0.1)
+            except Empty:
+                dead = [w.exitcode for w in workers if w.exitcode not in (None, 0)]
+                if dead:
+                    raise RuntimeError(f"Consumer process exited with code {dead[0]}")
+                continue
+
+            if batch is None:
+                finished += 1
+            else:
+                collected.extend(batch)
+    except BaseException:
+        failed.set()
+        for worker in workers:
+            worker.terminate()
+        raise
+    finally:
+        feeder.join()
+        for worker in workers:
+            worker.join()
+
+    if shared.tag:
+        return [result for _, result in sorted(collected, key=itemgetter(0))]
+    return collected
+
+
+# Queue implementations selectable through run_pipeline(queue_impl=...)
+QUEUE_IMPLS = {"blocking": BlockingQueue, "ring": RingBufferQueue, "priority": PriorityBlockingQueue}
+
+
+def run_pipeline(
+    source: Iterable[T],
+    queue_size: int = 10,
+    batch_size: int = 1,
+    producers: int = 1,
+    consumers: int = 1,
+    process: Optional[Callable[[T], Any]] = None,
+    ordered: bool = True,
+    backend: str = "thread",
+    queue_impl: str = "blocking",
+    metrics: bool = False,
+    sample_interval: Optional[float] = None,
+    adaptive: Optional[Tuple[int, int]] = None,
+    on_high_watermark: Optional[Callable[[int], Any]] = None,
+    on_low_watermark: Optional[Callable[[int], Any]] = None,
+    priority: Optional[Callable[[T], Any]] = None,
+) -> PipelineResult:
     """
     Producer-consumer pipeline for Assignment 1.
+
+    Returns the destination list as a PipelineResult, whose `.stats`
+    (PipelineStats) holds produced/consumed/failed counts, elapsed time and
+    time blocked in queue waits. `metrics=True` also records per-item
+    produce → consume latency (thread backend); `sample_interval` samples
+    queue depth every that many seconds and logs progress at INFO.
+    Both are off by default and cost nothing then.
+
+    `adaptive=(min_size, max_size)` starts at `queue_size` and lets an
+    AdaptiveCapacity controller resize the queue within those bounds.
+    `on_high_watermark` / `on_low_watermark` get the queue depth when it
+    reaches 80% of capacity / falls back to 20%, so upstream can throttle.
+    Both need the default thread backend and BlockingQueue.
+
+    `batch_size` > 1 moves items through the queue in batches
+    (put_many / get_many), trading per-item latency for throughput.
+
+    `producers` threads share one iterator over `source`; `consumers`
+    threads apply `process` (if given) to each item. Shutdown sends one
+    sentinel per consumer once every producer is done. With several workers
+    `ordered=True` tags items with sequence numbers and returns results in
+    input order; `ordered=False` skips that bookkeeping and returns them in
+    completion order.
+
+    `backend="process"` runs the consumers as worker processes fed in
+    batches over a bounded multiprocessing queue (see _run_process_pipeline),
+    for CPU-bound `process` functions.
+
+    `queue_impl="ring"` swaps BlockingQueue for the lock-free-fast-path
+    RingBufferQueue; it needs exactly one producer and one consumer.
+    `queue_impl="priority"` uses a two-lane PriorityBlockingQueue and puts
+    each source item in lane `priority(item)` (0 = urgent, 1 = bulk):
+    urgent items skip the backlog, and output follows processing order
+    unless `ordered` tagging applies.
     
     Testing Objectives: 
     1. Thread synchronization
@@ -116,27 +1184,123 @@ def run_pipeline(source: List[T], queue_size: int = 10) -> List[T]:
     3. Blocking queues
     4. Wait/Notify mechanism
     """
+    if producers <= 0 or consumers <= 0:
+        raise ValueError("producers and consumers must be greater than 0.")
+    if batch_size <= 0:
+        raise ValueError("batch_size must be greater than 0.")
+    if backend not in ("thread", "process"):
+        raise ValueError(f"Unknown backend: {backend!r} (expected 'thread' or 'process').")
+    if queue_impl not in QUEUE_IMPLS:
+        raise ValueError(f"Unknown queue_impl: {queue_impl!r} (expected one of {sorted(QUEUE_IMPLS)}).")
+    if queue_impl == "ring" and (producers != 1 or consumers != 1 or backend != "thread"):
+        raise ValueError("queue_impl='ring' supports a single producer and consumer thread only.")
+    if backend == "process" and queue_impl != "blocking":
+        raise ValueError("The process backend uses its own multiprocessing queue; queue_impl must be 'blocking'.")
+    if priority is not None and queue_impl != "priority":
+        raise ValueError("priority= needs queue_impl='priority'.")
+    if sample_interval is not None and sample_interval <= 0:
+        raise ValueError("sample_interval must be greater than 0.")
+    watermarks = on_high_watermark is not None or on_low_watermark is not None
+    if (adaptive is not None or watermarks) and (backend != "thread" or queue_impl == "ring"):
+        raise ValueError("adaptive sizing and watermarks need backend='thread' and a BlockingQueue-based queue_impl.")
+
+    tag = ordered and (producers > 1 or consumers > 1)
+    timed = metrics and backend == "thread"
+    shared = SharedSource(source, tag=tag, timestamps=timed)
+    stats = PipelineStats()
+
+    if backend == "process":
+        start = time.time()
+        destination = _run_process_pipeline(shared, queue_size, batch_size, producers, consumers, process)
+        end = time.time()
+
+        stats.produced, stats.consumed, stats.elapsed = shared.count, len(destination), end - start
+        stats.failed = stats.produced - stats.consumed
+        _print_summary(stats.produced, stats.consumed, stats.elapsed)
+        return PipelineResult(destination, stats)
+    if tag and process is not None:
+        step = lambda pair: (pair[0], process(pair[1]))
+    else:
+        step = process
 
-    queue: BlockingQueue[T] = BlockingQueue(max_size=queue_size)
-    destination: List[T] = []
+    if queue_impl == "priority":
+        # Rank by the source item, looking through the (timestamp, ...) and (seq, ...) wrappers
+        rank = priority
+        if tag:
+            rank = lambda entry, inner=rank: inner(entry[1])
+        if timed:
+            rank = lambda entry, inner=rank: inner(entry[1])
+        queue = PriorityBlockingQueue(max_size=queue_size, priority_of=rank)
+    else:
+        queue = QUEUE_IMPLS[queue_impl](max_size=queue_size)
+    outputs: List[List[Any]] = [[] for _ in range(consumers)]
 
-    producer = Producer(source, queue, SENTINEL)
-    consumer = Consumer(queue, destination, SENTINEL)
+    # A lone producer signals the consumers itself; a group is signalled after the last one finishes
+    producer_threads = [
+        Producer(shared, queue, SENTINEL, batch_size=batch_size, sentinels=consumers if producers == 1 else 0)
+        for _ in range(producers)
+    ]
+    latencies = [LatencyHistogram() if timed else None for _ in outputs]
+    consumer_threads = [
+        Consumer(queue, out, SENTINEL, batch_size=batch_size, process=step, latency=latency)
+        for out, latency in zip(outputs, latencies)
+    ]
+    sampler = None
+    if sample_interval is not None:
+        sampler = _PipelineSampler(queue, sample_interval, stats, lambda: (shared.count, sum(map(len, outputs))))
+    controller = None
+    if adaptive is not None:
+        controller = AdaptiveCapacity(
+            queue, *adaptive, progress=lambda: sum(map(len, outputs)), producers=producers, consumers=consumers
+        )
+    if watermarks:
+        queue.set_watermarks(on_high_watermark, on_low_watermark)
 
     start = time.time()
-    producer.start()
-    consumer.start()
+    for helper in (sampler, controller):
+        if helper is not None:
+            helper.start()
+    for thread in consumer_threads + producer_threads:
+        thread.start()
 
-    producer.join()
-    consumer.join()
+    for thread in producer_threads:
+        thread.join()
+    if producers > 1:
+        for _ in range(consumers):
+            queue.put(SENTINEL)
+
+    for thread in consumer_threads:
+        thread.join()
     end = time.time()
+    for helper in (sampler, controller):
+        if helper is not None:
+            helper.stop()
 
-    print("\n=== Pipeline Summary ===")
-    print(f"Produced:  {len(source)} items")
-    print(f"Consumed:  {len(destination)} items")
-    print(f"Time:      {end - start:.4f}s")
+    if tag:
+        destination = [result for _, result in sorted(chain(*outputs), key=itemgetter(0))]
+    else:
+        destination = list(chain(*outputs))
+
+    stats.produced, stats.consumed, stats.elapsed = shared.count, len(destination), end - start
+    stats.failed = sum(consumer.failed for consumer in consumer_threads)
+    stats.put_wait_seconds, stats.get_wait_seconds = queue.put_wait_seconds, queue.get_wait_seconds
+    if controller is not None:
+        stats.capacity_history = controller.history
+    if timed:
+        stats.latency = LatencyHistogram()
+        for latency in latencies:
+            stats.latency.merge(latency)
+
+    _print_summary(stats.produced, stats.consumed, stats.elapsed)
 
-    return destination
+    return PipelineResult(destination, stats)
+
+
+def _print_summary(produced: int, consumed: int, elapsed: float) -> None:
+    print("\n=== Pipeline Summary ===")
+    print(f"Produced:  {produced} items")
+    print(f"Consumed:  {consumed} items")
+    print(f"Time:      {elapsed:.4f}s")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+
+from assignment1.producer_consumer import Producer, SENTINEL
+from assignment1.async_producer_consumer import (
+    AsyncBlockingQueue,
+    AsyncQueueBridge,
+    async_run_pipeline,
+)
+
+
+# ============================================================
+#                  TEST: AsyncBlockingQueue Behavior
+# ============================================================
+
+
+def test_async_queue_put_get_fifo():
+    async def scenario():
+        q = AsyncBlockingQueue(max_size=3)
+        await q.put(1)
+        await q.put_many([2, 3])
+        assert q.size() == 3
+        return [await q.get(), *(await q.get_many(5))]
+
+    assert asyncio.run(scenario()) == [1, 2, 3]
+
+
+def test_async_queue_reject_zero_size():
+    with pytest.raises(ValueError):
+        AsyncBlockingQueue(max_size=0)
+
+
+def test_async_queue_put_waits_while_full():
+    async def scenario():
+        q = AsyncBlockingQueue(max_size=1)
+        await q.put("a")
+        blocked = asyncio.create_task(q.put("b"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        assert await q.get() == "a"
+        await blocked
+        return await q.get()
+
+    assert asyncio.run(scenario()) == "b"
+
+
+def test_async_queue_get_many_timeout_returns_empty():
+    async def scenario():
+        q = AsyncBlockingQueue(max_size=2)
+        return await q.get_many(2, timeout=0.01)
+
+    assert asyncio.run(scenario()) == []
+
+
+# ============================================================
+#                  TEST: async_run_pipeline
+# ============================================================
+
+
+def test_async_pipeline_many_workers_keeps_order():
+    async def slow_square(x):
+        await asyncio.sleep(0)
+        return x * x
+
+    source = list(range(500))
+    result = asyncio.run(async_run_pipeline(source, queue_size=16, producers=4, consumers=200, process=slow_square))
+
+    assert result == [x * x for x in source]
+
+
+def test_async_pipeline_async_source_and_batches():
+    async def numbers():
+        for i in range(50):
+            yield i
+
+    result = asyncio.run(async_run_pipeline(numbers(), queue_size=8, batch_size=5, producers=3, consumers=3))
+
+    assert result == list(range(50))
+
+
+def test_async_pipeline_skips_failing_items():
+    def fail_on_seven(x):
+        if x == 7:
+            raise ValueError("bad item")
+        return x
+
+    result = asyncio.run(async_run_pipeline(range(20), consumers=3, process=fail_on_seven, ordered=False))
+
+    assert sorted(result) == [x for x in range(20) if x != 7]
+
+
+# ============================================================
+#                  TEST: Thread → Async Bridge
+# ============================================================
+
+
+def test_threaded_producer_feeds_async_consumer():
+    async def scenario():
+        q = AsyncBlockingQueue(max_size=2)
+        producer = Producer(list(range(20)), AsyncQueueBridge(q, asyncio.get_running_loop()), SENTINEL)
+        producer.start()
+
+        received = []
+        while True:
+            item = await q.get()
+            if item is SENTINEL:
+                break
+            received.append(item)
+            await asyncio.sleep(0)
+
+        await asyncio.to_thread(producer.join)
+        return received
+
+    assert asyncio.run(scenario()) == list(range(20))
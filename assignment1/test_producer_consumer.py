@@ -1,9 +1,18 @@
+import os
 import time
 import threading
 import pytest
 
 from assignment1.producer_consumer import (
+    AdaptiveCapacity,
     BlockingQueue,
+    RingBufferQueue,
+    LatencyHistogram,
+    PriorityBlockingQueue,
+    Reducer,
+    QueueClosed,
+    QueueEmpty,
+    QueueFull,
     Producer,
     Consumer,
     run_pipeline,
@@ -213,3 +222,560 @@ def test_pipeline_queue_capacity_stress():
     result = run_pipeline(source, queue_size=2)
 
     assert result == source
+
+
+# ============================================================
+#                TEST: Batch Operations (put_many / get_many)
+# ============================================================
+
+
+def test_put_many_and_get_many_preserve_order():
+    q = BlockingQueue(max_size=10)
+    q.put_many([1, 2, 3, 4])
+
+    assert q.get_many(3) == [1, 2, 3]
+    assert q.get_many(3) == [4]
+    assert q.size() == 0
+
+
+def test_get_many_times_out_when_empty():
+    q = BlockingQueue(max_size=2)
+
+    start = time.monotonic()
+    assert q.get_many(5, timeout=0.05) == []
+    assert time.monotonic() - start >= 0.05
+
+    with pytest.raises(ValueError):
+        q.get_many(0)
+
+
+def test_put_many_larger_than_capacity_blocks_until_drained():
+    q = BlockingQueue(max_size=3)
+    received = []
+
+    t = threading.Thread(target=q.put_many, args=(list(range(10)),))
+    t.start()
+
+    while len(received) < 10:
+        received.extend(q.get_many(4, timeout=1))
+
+    t.join(timeout=1)
+    assert received == list(range(10))
+    assert t.is_alive() is False
+
+
+def test_batched_consumer_returns_items_after_its_sentinel():
+    q = BlockingQueue(max_size=10)
+    destination = []
+
+    q.put_many([1, 2, SENTINEL, 999])
+
+    consumer = Consumer(q, destination, SENTINEL, batch_size=10)
+    consumer.start()
+    consumer.join(timeout=1)
+
+    assert destination == [1, 2]
+    assert q.get() == 999
+
+
+def test_batched_producer_flushes_partial_batch_on_failure():
+    def exploding():
+        yield 1
+        yield 2
+        raise RuntimeError("Simulated failure during iteration")
+
+    q = BlockingQueue(max_size=10)
+    producer = Producer(exploding(), q, SENTINEL, batch_size=5)
+
+    producer.start()
+    producer.join(timeout=1)
+
+    assert q.get_many(10) == [1, 2, SENTINEL]
+
+
+def test_batched_pipeline():
+    source = list(range(500))
+    result = run_pipeline(source, queue_size=16, batch_size=7)
+
+    assert result == source
+
+
+# ============================================================
+#            TEST: Multi-Producer / Multi-Consumer Pipeline
+# ============================================================
+
+
+def test_multi_worker_pipeline_preserves_order():
+    source = list(range(300))
+    result = run_pipeline(source, queue_size=4, producers=3, consumers=4, process=lambda x: x * 2)
+
+    assert result == [x * 2 for x in source]
+
+
+def test_multi_worker_pipeline_unordered_mode():
+    source = list(range(300))
+    result = run_pipeline(source, queue_size=4, producers=2, consumers=3, ordered=False, batch_size=8)
+
+    assert sorted(result) == source
+
+
+def test_pipeline_skips_items_whose_processing_fails():
+    def process(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return x
+
+    result = run_pipeline([1, 2, 3, 4], producers=2, consumers=2, process=process)
+
+    assert result == [1, 2, 4]
+
+
+def test_io_bound_processing_scales_with_consumers():
+    source = list(range(40))
+
+    def slow(x):
+        time.sleep(0.01)
+        return x
+
+    start = time.monotonic()
+    result = run_pipeline(source, queue_size=8, consumers=8, process=slow)
+    elapsed = time.monotonic() - start
+
+    assert result == source
+    assert elapsed < 40 * 0.01 / 2     # serial would take ~0.4s
+
+
+def test_pipeline_rejects_zero_workers():
+    with pytest.raises(ValueError):
+        run_pipeline([1], consumers=0)
+
+
+# ============================================================
+#                 TEST: Process-Based Pipeline Backend
+# ============================================================
+
+
+def _cube(x):
+    return x ** 3
+
+
+def _fail_on_seven(x):
+    if x == 7:
+        raise ValueError("bad item")
+    return x
+
+
+def _exit_worker(x):
+    os._exit(3)
+
+
+def test_process_backend_preserves_order():
+    source = list(range(200))
+    result = run_pipeline(source, queue_size=32, batch_size=16, consumers=3, process=_cube, backend="process")
+
+    assert result == [x ** 3 for x in source]
+
+
+def test_process_backend_unordered_and_failures():
+    source = list(range(20))
+    result = run_pipeline(source, producers=2, consumers=2, process=_fail_on_seven, ordered=False, backend="process")
+
+    assert sorted(result) == [x for x in source if x != 7]
+
+
+def test_process_backend_single_worker_keeps_fifo():
+    source = [1, None, "a", (2, 3)]
+    result = run_pipeline(source, queue_size=2, backend="process")
+
+    assert result == source
+
+
+def test_process_backend_raises_when_worker_dies():
+    with pytest.raises(RuntimeError):
+        run_pipeline(list(range(1000)), queue_size=4, consumers=2, process=_exit_worker, backend="process")
+
+
+def test_pipeline_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        run_pipeline([1], backend="fiber")
+
+
+# ============================================================
+#                  TEST: SPSC Ring Buffer Queue
+# ============================================================
+
+
+def test_ring_queue_fifo_across_wraparound():
+    q = RingBufferQueue(max_size=3)
+    out = []
+    for i in range(10):
+        q.put(i)
+        q.put_many([f"{i}a", f"{i}b"])
+        out.append(q.get())
+        out.extend(q.get_many(5))
+
+    assert out == [x for i in range(10) for x in (i, f"{i}a", f"{i}b")]
+    assert q.size() == 0
+
+
+def test_ring_queue_get_many_timeout_and_validation():
+    q = RingBufferQueue(max_size=2)
+    assert q.get_many(2, timeout=0.01) == []
+    with pytest.raises(ValueError):
+        q.get_many(0)
+    with pytest.raises(ValueError):
+        RingBufferQueue(max_size=0)
+
+
+def test_ring_queue_threads_preserve_order_under_backpressure():
+    q = RingBufferQueue(max_size=2)
+    received = []
+
+    def consume():
+        while len(received) < 5000:
+            received.extend(q.get_many(3, timeout=1))
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    for i in range(0, 5000, 7):
+        q.put_many(range(i, min(i + 7, 5000)))
+    consumer.join(timeout=10)
+
+    assert received == list(range(5000))
+
+
+def test_pipeline_ring_queue_matches_blocking():
+    source = list(range(300)) + [None]
+
+    assert run_pipeline(source, queue_size=4, queue_impl="ring") == source
+    assert run_pipeline(source, queue_size=4, batch_size=8, queue_impl="ring") == source
+
+
+def test_pipeline_ring_queue_rejects_multiple_workers():
+    with pytest.raises(ValueError):
+        run_pipeline([1], consumers=2, queue_impl="ring")
+    with pytest.raises(ValueError):
+        run_pipeline([1], queue_impl="lockfree")
+
+
+# ============================================================
+#                  TEST: Pipeline Metrics
+# ============================================================
+
+
+def test_pipeline_returns_stats_without_per_item_output(capsys):
+    result = run_pipeline(list(range(100)), queue_size=2)
+
+    assert result == list(range(100))
+    assert result.stats.produced == 100
+    assert result.stats.consumed == 100
+    assert result.stats.failed == 0
+    assert result.stats.latency is None
+    assert "[Consumer] Consumed" not in capsys.readouterr().out
+
+
+def test_pipeline_stats_count_failures_and_latency():
+    result = run_pipeline(list(range(50)), consumers=2, process=_fail_on_seven, metrics=True)
+
+    assert result.stats.failed == 1
+    assert result.stats.consumed == 49
+    assert result.stats.latency.count == 50
+    assert 0 < result.stats.latency.percentile(50) <= result.stats.latency.max_ns
+
+
+def test_pipeline_records_queue_waits_and_depth_samples():
+    def slow(x):
+        time.sleep(0.002)
+        return x
+
+    result = run_pipeline(list(range(40)), queue_size=2, process=slow, sample_interval=0.005)
+
+    assert result.stats.put_wait_seconds > 0
+    assert result.stats.depth_samples
+    assert max(result.stats.depth_samples) <= 2
+
+
+def test_latency_histogram_percentiles_and_merge():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    for ns in (100, 200, 300):
+        a.record(ns)
+    b.record(10_000)
+    a.merge(b)
+
+    assert a.count == 4
+    assert a.percentile(50) == 256
+    assert a.percentile(100) == 10_000
+    with pytest.raises(ValueError):
+        a.percentile(0)
+
+
+# ============================================================
+#            TEST: Timeouts, try_put/try_get and close()
+# ============================================================
+
+
+def test_queue_put_and_get_time_out():
+    q = BlockingQueue(max_size=1)
+
+    with pytest.raises(QueueEmpty):
+        q.get(timeout=0.01)
+    q.put("a", timeout=0.01)
+    with pytest.raises(QueueFull):
+        q.put("b", timeout=0.01)
+    with pytest.raises(ValueError):
+        q.put("b", timeout=-1)
+
+
+def test_queue_try_put_and_try_get_never_block():
+    q = BlockingQueue(max_size=1)
+    missing = object()
+
+    assert q.try_get(missing) is missing
+    assert q.try_put(1) is True
+    assert q.try_put(2) is False
+    assert q.try_get() == 1
+
+
+def test_close_wakes_blocked_producer_and_consumer():
+    full, empty = BlockingQueue(max_size=1), BlockingQueue(max_size=1)
+    full.put("x")
+    errors = []
+
+    def call(fn, *args):
+        try:
+            fn(*args)
+        except QueueClosed as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call, args=(full.put, "y")), threading.Thread(target=call, args=(empty.get,))]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    full.close()
+    empty.close()
+    for t in threads:
+        t.join(timeout=1)
+
+    assert len(errors) == 2
+    assert not any(t.is_alive() for t in threads)
+
+
+def test_closed_queue_drains_then_raises():
+    q = BlockingQueue(max_size=3)
+    q.put_many([1, 2, 3])
+    q.close()
+
+    with pytest.raises(QueueClosed):
+        q.put(4)
+    assert q.get() == 1
+    assert q.get_many(5) == [2, 3]
+    with pytest.raises(QueueClosed):
+        q.get(timeout=1)
+
+
+def test_close_stops_stalled_producer_without_sentinel_backlog():
+    q = BlockingQueue(max_size=1)
+    producer = Producer(list(range(100)), q, SENTINEL)
+    producer.start()
+    time.sleep(0.05)
+
+    q.close()
+    producer.join(timeout=1)
+
+    assert not producer.is_alive()
+    assert q.get() == 0
+
+
+def test_consumer_exits_when_queue_closed_and_drained():
+    q = BlockingQueue(max_size=5)
+    q.put_many([1, 2])
+    destination = []
+    consumer = Consumer(q, destination, SENTINEL, batch_size=4)
+
+    q.close()
+    consumer.start()
+    consumer.join(timeout=1)
+
+    assert destination == [1, 2]
+
+
+# ============================================================
+#          TEST: Resizing, Watermarks and Adaptive Capacity
+# ============================================================
+
+
+def test_resize_grow_wakes_blocked_producer():
+    q = BlockingQueue(max_size=1)
+    q.put(1)
+    t = threading.Thread(target=q.put, args=(2,))
+    t.start()
+    time.sleep(0.05)
+    assert t.is_alive()
+
+    q.resize(2)
+    t.join(timeout=1)
+
+    assert not t.is_alive()
+    assert q.size() == 2
+
+
+def test_resize_shrink_keeps_items():
+    q = BlockingQueue(max_size=4)
+    q.put_many([1, 2, 3, 4])
+    q.resize(2)
+
+    assert q.try_put(5) is False
+    assert q.get_many(10) == [1, 2, 3, 4]
+    assert q.try_put(5) is True
+
+
+def test_watermarks_fire_once_per_crossing():
+    q = BlockingQueue(max_size=10)
+    events = []
+    q.set_watermarks(lambda d: events.append(("high", d)), lambda d: events.append(("low", d)))
+
+    for i in range(9):
+        q.put(i)
+    for _ in range(8):
+        q.get()
+    q.put_many(range(7))
+
+    assert events == [("high", 8), ("low", 2), ("high", 8)]
+    with pytest.raises(ValueError):
+        q.set_watermarks(high=0.2, low=0.5)
+
+
+def test_adaptive_capacity_grows_shrinks_and_undoes_costly_shrink():
+    q = BlockingQueue(max_size=4)
+    controller = AdaptiveCapacity(q, min_size=2, max_size=16, progress=lambda: 0)
+
+    assert controller.step(put_wait=0.5, get_wait=0.5, rate=100) == 8     # both sides stall → grow
+    assert controller.step(put_wait=0.0, get_wait=0.5, rate=100) == 8     # producer-bound → leave
+    assert controller.step(put_wait=0.5, get_wait=0.0, rate=100) == 4     # consumer-bound → shrink
+    assert controller.step(put_wait=0.5, get_wait=0.0, rate=50) == 8      # shrink cost throughput → undo
+    assert controller.step(put_wait=0.5, get_wait=0.0, rate=50) == 8      # ... and stay there
+    assert controller.history == [4, 8, 4, 8]
+
+    with pytest.raises(ValueError):
+        AdaptiveCapacity(q, min_size=8, max_size=4, progress=lambda: 0)
+
+
+def test_pipeline_adaptive_stays_within_bounds_and_throttles():
+    throttle = threading.Event()
+    throttle.set()
+
+    def source():
+        for i in range(300):
+            throttle.wait()
+            yield i
+
+    def bursty(x):
+        if x % 50 == 0:
+            time.sleep(0.02)
+        return x
+
+    highs = []
+    result = run_pipeline(
+        source(), queue_size=2, process=bursty, adaptive=(2, 32),
+        on_high_watermark=lambda depth: (highs.append(depth), throttle.clear()),
+        on_low_watermark=lambda depth: throttle.set(),
+    )
+
+    assert result == list(range(300))
+    assert highs
+    assert all(2 <= size <= 32 for size in result.stats.capacity_history)
+    with pytest.raises(ValueError):
+        run_pipeline([1], adaptive=(1, 8), queue_impl="ring")
+
+
+# ============================================================
+#              TEST: Priority (Multi-Lane) Queue
+# ============================================================
+
+
+def test_priority_queue_serves_urgent_lane_first_fifo_within_lane():
+    q = PriorityBlockingQueue(max_size=10)
+    q.put_many(["bulk-1", "bulk-2"], priority=1)
+    q.put("urgent-1", priority=0)
+    q.put("bulk-3", priority=1)
+    q.put("urgent-2")  # default_priority=0
+
+    assert q.lane_sizes() == [2, 3]
+    assert q.get_many(10) == ["urgent-1", "urgent-2", "bulk-1", "bulk-2", "bulk-3"]
+
+
+def test_priority_queue_weighted_lanes_do_not_starve_bulk():
+    q = PriorityBlockingQueue(max_size=20, weights=[3, 1])
+    q.put_many(range(8), priority=0)
+    q.put_many("abc", priority=1)
+
+    assert q.get_many(20) == [0, 1, 2, "a", 3, 4, 5, "b", 6, 7, "c"]
+
+
+def test_priority_queue_keeps_sentinel_last_and_bounds():
+    q = PriorityBlockingQueue(max_size=2, priority_of=lambda x: 0 if x < 0 else 1)
+    q.put(5)
+    q.put(SENTINEL)
+    assert q.try_put(-1) is False
+
+    assert q.get() == 5
+    q.put(-1)
+    assert q.get() == -1
+    assert q.get() is SENTINEL
+    with pytest.raises(ValueError):
+        q.put(1, priority=2)
+    with pytest.raises(ValueError):
+        PriorityBlockingQueue(lanes=2, weights=[1])
+
+
+def test_pipeline_priority_queue_delivers_everything():
+    source = list(range(200))
+    result = run_pipeline(source, queue_size=8, consumers=2, queue_impl="priority", priority=lambda x: x % 2)
+
+    assert result == source
+    with pytest.raises(ValueError):
+        run_pipeline(source, priority=lambda x: 0)
+
+
+# ============================================================
+#          TEST: Streaming Sources and Sink Consumers
+# ============================================================
+
+
+def test_producer_streams_generator_into_reducer_sinks():
+    produced = []
+
+    def numbers():
+        for i in range(1000):
+            produced.append(i)
+            yield i
+
+    q = BlockingQueue(max_size=4)
+    sums = [Reducer(lambda total, x: total + x, 0) for _ in range(2)]
+    producer = Producer(numbers(), q, SENTINEL, batch_size=8, sentinels=2)
+    consumers = [Consumer(q, sink, SENTINEL) for sink in sums]
+
+    for t in consumers + [producer]:
+        t.start()
+    for t in consumers + [producer]:
+        t.join()
+
+    assert sum(sink.value for sink in sums) == sum(range(1000))
+    assert len(produced) == 1000
+
+
+def test_consumer_sink_callable_gets_processed_items(tmp_path):
+    path = tmp_path / "lines.txt"
+    path.write_text("a\nb\nc\n")
+    seen = []
+
+    with open(path) as f:
+        q = BlockingQueue(max_size=1)
+        producer = Producer(f, q, SENTINEL)
+        consumer = Consumer(q, seen.append, SENTINEL, process=str.strip)
+        producer.start()
+        consumer.start()
+        producer.join()
+        consumer.join()
+
+    assert seen == ["a", "b", "c"]
@@ -1,8 +1,26 @@
 import csv
+import datetime
+import hashlib
+import io
+import json
 import logging
-from dataclasses import dataclass
-from functools import reduce
-from typing import List, Dict, Callable, Any, Tuple
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, namedtuple
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy, deepcopy
+from dataclasses import asdict, dataclass
+from functools import wraps
+from itertools import chain, compress, islice
+from operator import itemgetter, mul
+from typing import List, Dict, Callable, Any, Tuple, Iterable, Iterator, Optional, Union
 
 
 # ---------------------------------------------------------
@@ -21,139 +39,1701 @@ class SaleRecord:
         return self.units_sold * self.unit_price
 
 
+# ---------------------------------------------------------
+# Columnar Storage
+# ---------------------------------------------------------
+def _parse_year_month(date: str) -> Optional[Tuple[int, int]]:
+    try:
+        year, month, _ = date.split("-")
+        return int(year), int(month)
+    except Exception:
+        return None
+
+
+def _parse_date_key(date: str) -> int:
+    """'YYYY-MM-DD' → YYYYMMDD as an int (orders like the date), or -1 if it cannot be parsed."""
+    try:
+        year, month, day = map(int, date.split("-"))
+    except Exception:
+        return -1
+    if not (1 <= month <= 12 and 1 <= day <= 31 and 0 <= year <= 9999):
+        return -1
+    return year * 10000 + month * 100 + day
+
+
+def _date_key(value: Union[str, datetime.date, None]) -> Optional[int]:
+    """Normalize a `start=` / `end=` bound to a YYYYMMDD int."""
+    if value is None:
+        return None
+    if isinstance(value, datetime.date):
+        return value.year * 10000 + value.month * 100 + value.day
+
+    key = _parse_date_key(value)
+    if key < 0:
+        raise ValueError(f"Invalid date (expected YYYY-MM-DD): {value!r}")
+    return key
+
+
+class StringDictionary:
+    """Dictionary encoding: each distinct string is stored once and rows hold an int code."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class SalesColumns:
+    """
+    Parallel typed columns holding the sales table.
+
+    Numeric fields live in `array.array` buffers (8 bytes per value), the
+    string fields are dictionary-encoded, and revenue is computed once per row
+    at append time. Each distinct date is parsed to (year, month) once.
+    """
+
+    def __init__(self):
+        self.dates = StringDictionary()
+        self.regions = StringDictionary()
+        self.products = StringDictionary()
+        self.months: Dict[Tuple[int, int], int] = {}
+
+        self.date_codes = array("i")
+        self.region_codes = array("i")
+        self.product_codes = array("i")
+        self.units_sold = array("q")
+        self.unit_price = array("d")
+        self.revenue = array("d")
+
+        # Per date code: slot in `months`, or -1 if the date cannot be parsed
+        self.month_of_date = array("i")
+        # Per date code: YYYYMMDD key, or -1 if the date cannot be parsed
+        self.day_of_date = array("i")
+
+        # Bumped on every mutation so caches can tell stale results apart
+        self.version = 0
+
+    def _encode_date(self, date: str) -> int:
+        date_code = self.dates.encode(date)
+        if date_code == len(self.month_of_date):
+            ym = _parse_year_month(date)
+            self.month_of_date.append(-1 if ym is None else self.months.setdefault(ym, len(self.months)))
+            self.day_of_date.append(_parse_date_key(date))
+        return date_code
+
+    def append(self, date: str, region: str, product: str, units_sold: int, unit_price: float) -> None:
+        self.version += 1
+        self.units_sold.append(units_sold)
+        self.unit_price.append(unit_price)
+        self.revenue.append(units_sold * unit_price)
+        self.date_codes.append(self._encode_date(date))
+        self.region_codes.append(self.regions.encode(region))
+        self.product_codes.append(self.products.encode(product))
+
+    def extend_rows(self, rows: Iterable[Tuple[str, str, str, int, float]]) -> None:
+        """
+        Bulk `append`: transpose the rows once and extend every column in a
+        single pass. New strings get their codes in first-seen order, exactly
+        as row-by-row appends would assign them.
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        dates, regions, products, units_sold, unit_price = zip(*rows)
+        # Typed first so an out-of-range value fails before anything is appended
+        units_sold = array("q", units_sold)
+        unit_price = array("d", unit_price)
+
+        self.version += 1
+        for date in dict.fromkeys(dates):
+            self._encode_date(date)
+        for region in dict.fromkeys(regions):
+            self.regions.encode(region)
+        for product in dict.fromkeys(products):
+            self.products.encode(product)
+
+        self.units_sold.extend(units_sold)
+        self.unit_price.extend(unit_price)
+        self.revenue.extend(map(mul, units_sold, unit_price))
+        self.date_codes.extend(map(self.dates.codes.__getitem__, dates))
+        self.region_codes.extend(map(self.regions.codes.__getitem__, regions))
+        self.product_codes.extend(map(self.products.codes.__getitem__, products))
+
+    def extend(self, other: "SalesColumns") -> None:
+        """Append every row of `other`, re-mapping its dictionary codes onto ours."""
+        self.version += 1
+        date_map = [self._encode_date(v) for v in other.dates.values]
+        region_map = [self.regions.encode(v) for v in other.regions.values]
+        product_map = [self.products.encode(v) for v in other.products.values]
+
+        self.units_sold.extend(other.units_sold)
+        self.unit_price.extend(other.unit_price)
+        self.revenue.extend(other.revenue)
+        self.date_codes.extend(array("i", map(date_map.__getitem__, other.date_codes)))
+        self.region_codes.extend(array("i", map(region_map.__getitem__, other.region_codes)))
+        self.product_codes.extend(array("i", map(product_map.__getitem__, other.product_codes)))
+
+    def rows(self, start: int = 0) -> Iterator[Tuple[str, str, str, int, float]]:
+        """Decoded (date, region, product, units_sold, unit_price) tuples from row `start` on."""
+        return zip(
+            map(self.dates.values.__getitem__, self.date_codes[start:]),
+            map(self.regions.values.__getitem__, self.region_codes[start:]),
+            map(self.products.values.__getitem__, self.product_codes[start:]),
+            self.units_sold[start:],
+            self.unit_price[start:],
+        )
+
+    def rows_at(self, row_ids: Iterable[int]) -> Iterator[Tuple[str, str, str, int, float]]:
+        """Decoded (date, region, product, units_sold, unit_price) tuples for the given rows."""
+        dates, regions, products = self.dates.values, self.regions.values, self.products.values
+        for i in row_ids:
+            yield (
+                dates[self.date_codes[i]],
+                regions[self.region_codes[i]],
+                products[self.product_codes[i]],
+                self.units_sold[i],
+                self.unit_price[i],
+            )
+
+    def record(self, i: int) -> SaleRecord:
+        return SaleRecord(
+            date=self.dates.values[self.date_codes[i]],
+            region=self.regions.values[self.region_codes[i]],
+            product=self.products.values[self.product_codes[i]],
+            units_sold=self.units_sold[i],
+            unit_price=self.unit_price[i],
+        )
+
+    def __len__(self) -> int:
+        return len(self.revenue)
+
+
+class SaleRecordView(Sequence):
+    """Read-only list-like view that materializes `SaleRecord` objects on access."""
+
+    def __init__(self, columns: SalesColumns):
+        self._columns = columns
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._columns.record(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("SaleRecordView index out of range")
+        return self._columns.record(index)
+
+    def __iter__(self) -> Iterator[SaleRecord]:
+        return map(self._columns.record, range(len(self)))
+
+
+# ---------------------------------------------------------
+# Revenue Index
+# ---------------------------------------------------------
+class RevenueIndex:
+    """
+    Row ids sorted by (revenue, row), kept in step with a `SalesColumns`.
+
+    Threshold and range lookups are a binary search plus the matching slice.
+    A few appended rows are inserted one by one; larger batches are sorted
+    and merged in, O(n + batch log batch).
+    """
+
+    # Appended batches up to this size are inserted row by row (each insert is O(n))
+    INSERT_LIMIT = 16
+
+    def __init__(self, columns: SalesColumns):
+        self.columns = columns
+        self.rows = array("q")
+        self.revenue = array("d")
+        self.lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self) -> None:
+        with self.lock:
+            indexed, total = len(self.rows), len(self.columns)
+            if indexed == total:
+                return
+
+            revenue = self.columns.revenue
+            if total - indexed > self.INSERT_LIMIT:
+                batch = sorted(range(indexed, total), key=revenue.__getitem__)
+                # Two ascending runs: timsort merges them in linear time, and being
+                # stable it keeps older rows first among equal revenues
+                self.rows = array("q", sorted(chain(self.rows, batch), key=revenue.__getitem__))
+                self.revenue = array("d", map(revenue.__getitem__, self.rows))
+                return
+
+            for row in range(indexed, total):
+                pos = bisect_right(self.revenue, revenue[row])
+                self.revenue.insert(pos, revenue[row])
+                self.rows.insert(pos, row)
+
+    def at_least(self, threshold: float) -> List[int]:
+        """Rows with revenue >= threshold, in file order."""
+        return sorted(self.rows[bisect_left(self.revenue, threshold):])
+
+    def between(self, low: float, high: float) -> List[int]:
+        """Rows with low <= revenue <= high, in file order."""
+        return sorted(self.rows[bisect_left(self.revenue, low):bisect_right(self.revenue, high)])
+
+    def bottom(self, k: int) -> List[int]:
+        """The k lowest-revenue rows, lowest first (earlier rows win ties)."""
+        return list(self.rows[:max(k, 0)])
+
+    def top(self, k: int) -> List[int]:
+        """The k highest-revenue rows, highest first (earlier rows win ties)."""
+        n = len(self.rows)
+        k = min(max(k, 0), n)
+        if k == 0:
+            return []
+
+        # Rows strictly above the k-th value, then the earliest rows tied with it
+        cut = self.revenue[n - k]
+        above = bisect_right(self.revenue, cut)
+        tied = bisect_left(self.revenue, cut)
+        picked = list(self.rows[above:])[::-1] + list(self.rows[tied:tied + k - (n - above)])
+
+        revenue = self.columns.revenue
+        return sorted(picked, key=lambda row: (-revenue[row], row))
+
+
+# ---------------------------------------------------------
+# Date Index
+# ---------------------------------------------------------
+class DateIndex:
+    """
+    Row ids partitioned by calendar month (YYYYMM), kept in step with a `SalesColumns`.
+
+    A date-range lookup only visits the months that overlap the range, and
+    only the two boundary months are checked row by row. Rows whose date
+    cannot be parsed are not indexed and never match a range.
+    """
+
+    def __init__(self, columns: SalesColumns):
+        self.columns = columns
+        self.partitions: Dict[int, array] = {}
+        self.months: List[int] = []  # sorted partition keys
+        self.indexed = 0
+        self.lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self) -> None:
+        with self.lock:
+            cols = self.columns
+            day_of_date, date_codes = cols.day_of_date, cols.date_codes
+            for row in range(self.indexed, len(cols)):
+                key = day_of_date[date_codes[row]]
+                if key < 0:
+                    continue
+                month = key // 100
+                partition = self.partitions.get(month)
+                if partition is None:
+                    partition = self.partitions[month] = array("q")
+                    insort(self.months, month)
+                partition.append(row)
+            self.indexed = len(cols)
+
+    def rows_between(self, start: Optional[int], end: Optional[int]) -> List[int]:
+        """Rows dated within [start, end] (YYYYMMDD keys, None = open), in file order."""
+        lo = 0 if start is None else start
+        hi = 99999999 if end is None else end
+        day_of_date, date_codes = self.columns.day_of_date, self.columns.date_codes
+
+        rows: List[int] = []
+        first = bisect_left(self.months, lo // 100)
+        last = bisect_right(self.months, hi // 100)
+        for month in self.months[first:last]:
+            partition = self.partitions[month]
+            if lo // 100 < month < hi // 100:
+                rows.extend(partition)
+            else:
+                rows.extend(r for r in partition if lo <= day_of_date[date_codes[r]] <= hi)
+
+        # Partitions are each ascending; sorting restores file order across months
+        rows.sort()
+        return rows
+
+
+# ---------------------------------------------------------
+# Group-By Engine
+# ---------------------------------------------------------
+GROUP_KEYS = ("date", "region", "product", "month", "year")
+MEASURES = ("revenue", "units_sold", "unit_price")
+AGGREGATORS = ("sum", "count", "mean", "min", "max", "distinct")
+
+MetricSpec = Tuple[str, str, str]  # (label, column, aggregator)
+
+
+def _metric_specs(metrics: Dict[str, Union[str, Iterable[str]]]) -> Tuple[MetricSpec, ...]:
+    """
+    Normalize `{column: aggregator}` / `{column: [aggregators]}` to (label, column, aggregator).
+
+    A single aggregator is labelled by the column name, a list by `column_aggregator`.
+    Group keys can be used as columns too, with "count" and "distinct" only.
+    """
+    specs = []
+    for column, aggregators in metrics.items():
+        single = isinstance(aggregators, str)
+        if column not in MEASURES and column not in GROUP_KEYS:
+            raise ValueError(f"Unknown column '{column}'.")
+        for agg in [aggregators] if single else aggregators:
+            if agg not in AGGREGATORS or (column not in MEASURES and agg not in ("count", "distinct")):
+                raise ValueError(f"Aggregator '{agg}' is not supported for '{column}'.")
+            specs.append((column if single else f"{column}_{agg}", column, agg))
+    if not specs:
+        raise ValueError("At least one metric is required.")
+    return tuple(specs)
+
+
+def _key_codes(
+    columns: SalesColumns, key: str, row_ids: Optional[Sequence[int]] = None
+) -> Tuple[Sequence[int], List[Any]]:
+    """
+    Int codes of group key `key` for every row (or only `row_ids`, in that
+    order) and what each code decodes to; -1 = no value.
+    """
+    if key in ("date", "region", "product"):
+        codes = getattr(columns, f"{key}_codes")
+        if row_ids is not None:
+            codes = list(map(codes.__getitem__, row_ids))
+        return codes, getattr(columns, f"{key}s").values
+
+    # Month and year are looked up per selected row, never over the whole table
+    date_codes = columns.date_codes if row_ids is None else map(columns.date_codes.__getitem__, row_ids)
+    slots = map(columns.month_of_date.__getitem__, date_codes)
+    months = list(columns.months)
+    if key == "month":
+        return array("i", slots), months
+
+    years = sorted({year for year, _ in months})
+    year_code = {year: code for code, year in enumerate(years)}
+    # Trailing -1 so an unparseable date's slot (-1) maps to -1 again
+    year_of_slot = [year_code[year] for year, _ in months] + [-1]
+    return array("i", map(year_of_slot.__getitem__, slots)), years
+
+
+def group_by(
+    columns: SalesColumns,
+    keys: Iterable[str],
+    metrics: Union[Dict[str, Union[str, Iterable[str]]], Tuple[MetricSpec, ...]],
+    row_ids: Optional[Sequence[int]] = None,
+) -> Dict[Any, Dict[str, Any]]:
+    """
+    Hash-aggregate `columns` (or only `row_ids`) by `keys`.
+
+    `keys` are names from `GROUP_KEYS` ("month" is a (year, month) tuple) and
+    `metrics` maps a column to one or more of `AGGREGATORS`. Returns
+    `{group: {label: value}}`, groups in first-seen row order; a group is the
+    key value for one key, a tuple for several and `()` for none. Rows with
+    an unparseable date are left out when grouping by month or year.
+
+    One hashing pass gives every row a dense group id; each metric is then a
+    tight loop over (group id, value). Sums run in row order, so they match
+    the maintained aggregates exactly.
+    """
+    keys = tuple(keys)
+    unknown = [key for key in keys if key not in GROUP_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown group key(s): {', '.join(unknown)}")
+    specs = metrics if isinstance(metrics, tuple) else _metric_specs(metrics)
+
+    def select(column: Sequence[Any]) -> Sequence[Any]:
+        return column if row_ids is None else list(map(column.__getitem__, row_ids))
+
+    codes: Dict[str, Sequence[int]] = {}
+    decoders: Dict[str, List[Any]] = {}
+    for name in dict.fromkeys(keys + tuple(column for _, column, _ in specs if column in GROUP_KEYS)):
+        codes[name], decoders[name] = _key_codes(columns, name, row_ids)
+
+    # 1. hashing pass: dense group ids in first-seen order
+    if len(keys) == 1:
+        row_keys: Iterable[Any] = codes[keys[0]]
+    elif keys:
+        row_keys = zip(*(codes[key] for key in keys))
+    else:
+        row_keys = [()] * (len(columns) if row_ids is None else len(row_ids))
+    group_of: Dict[Any, int] = {}
+    gids = [group_of.setdefault(k, len(group_of)) for k in row_keys]
+    n_groups = len(group_of)
+
+    # 2. one loop per metric; sums and counts are shared between metrics
+    shared: Dict[Tuple[str, str], List[Any]] = {}
+
+    def aggregate(column: str, agg: str) -> List[Any]:
+        if (column, agg) in shared:
+            return shared[column, agg]
+        values = codes[column] if column in codes else select(getattr(columns, column))
+        if agg == "count":
+            acc = [0] * n_groups
+            for g in gids:
+                acc[g] += 1
+        elif agg == "sum":
+            acc = [0 if getattr(columns, column).typecode == "q" else 0.0] * n_groups
+            for g, v in zip(gids, values):
+                acc[g] += v
+        elif agg == "mean":
+            acc = [total / n for total, n in zip(aggregate(column, "sum"), aggregate(column, "count"))]
+        elif agg == "distinct":
+            seen: List[set] = [set() for _ in range(n_groups)]
+            for g, v in zip(gids, values):
+                seen[g].add(v)
+            if column in codes:
+                for s in seen:
+                    s.discard(-1)
+            acc = [len(s) for s in seen]
+        elif agg == "min":
+            acc = [None] * n_groups
+            for g, v in zip(gids, values):
+                cur = acc[g]
+                if cur is None or v < cur:
+                    acc[g] = v
+        else:
+            acc = [None] * n_groups
+            for g, v in zip(gids, values):
+                cur = acc[g]
+                if cur is None or v > cur:
+                    acc[g] = v
+        shared[column, agg] = acc
+        return acc
+
+    results = [(label, aggregate(column, agg)) for label, column, agg in specs]
+
+    # 3. decode the groups, dropping those without a parseable month/year
+    timed = [i for i, key in enumerate(keys) if key in ("month", "year")]
+    out: Dict[Any, Dict[str, Any]] = {}
+    for group, g in group_of.items():
+        if len(keys) == 1:
+            if timed and group < 0:
+                continue
+            group = decoders[keys[0]][group]
+        elif keys:
+            if any(group[i] < 0 for i in timed):
+                continue
+            group = tuple(decoders[key][code] for key, code in zip(keys, group))
+        out[group] = {label: acc[g] for label, acc in results}
+    return out
+
+
+# ---------------------------------------------------------
+# Rollup Cube
+# ---------------------------------------------------------
+class RollupCube:
+    """
+    Materialized rollup at the (region, product, year-month) grain.
+
+    Each cell holds the row count and the revenue, units_sold and unit_price
+    sums of its rows (rows with an unparseable date get a month-less cell),
+    so any coarser `group_by` costs O(cells) instead of O(rows). Float sums
+    are added cell by cell, so they can differ from a row-order scan in the
+    last bits. Like the indexes, `refresh()` folds in appended rows.
+    """
+
+    KEYS = ("region", "product", "month", "year")
+
+    def __init__(self, columns: SalesColumns):
+        self.columns = columns
+        self.cell_of: Dict[Tuple[int, int, int], int] = {}  # (region, product, month slot) codes → cell
+        self.rows: List[int] = []
+        self.revenue: List[float] = []
+        self.units_sold: List[int] = []
+        self.unit_price: List[float] = []
+        self.indexed = 0
+        self.lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self) -> None:
+        with self.lock:
+            cols = self.columns
+            start, end = self.indexed, len(cols)
+            if start == end:
+                return
+
+            cell_of = self.cell_of
+            keys = zip(
+                cols.region_codes[start:end],
+                cols.product_codes[start:end],
+                map(cols.month_of_date.__getitem__, cols.date_codes[start:end]),
+            )
+            cells = [cell_of.setdefault(key, len(cell_of)) for key in keys]
+
+            new = len(cell_of) - len(self.rows)
+            self.rows.extend([0] * new)
+            self.revenue.extend([0.0] * new)
+            self.units_sold.extend([0] * new)
+            self.unit_price.extend([0.0] * new)
+
+            rows, revenue, units_sold, unit_price = self.rows, self.revenue, self.units_sold, self.unit_price
+            for cell, rev, units, price in zip(
+                cells, cols.revenue[start:end], cols.units_sold[start:end], cols.unit_price[start:end]
+            ):
+                rows[cell] += 1
+                revenue[cell] += rev
+                units_sold[cell] += units
+                unit_price[cell] += price
+            self.indexed = end
+
+    @classmethod
+    def covers(cls, keys: Tuple[str, ...], specs: Tuple[MetricSpec, ...]) -> bool:
+        """True if the cube alone can answer this `group_by`."""
+        return all(key in cls.KEYS for key in keys) and all(
+            (column in MEASURES and agg in ("sum", "count", "mean"))
+            or (column in cls.KEYS and agg in ("count", "distinct"))
+            for _, column, agg in specs
+        )
+
+    def group_by(self, keys: Tuple[str, ...], specs: Tuple[MetricSpec, ...]) -> Dict[Any, Dict[str, Any]]:
+        """Same result shape and group order as the module-level `group_by`, from the cells."""
+        cols = self.columns
+        months = list(cols.months)
+        decode = {
+            "region": lambda region, product, slot: cols.regions.values[region],
+            "product": lambda region, product, slot: cols.products.values[product],
+            "month": lambda region, product, slot: months[slot],
+            "year": lambda region, product, slot: months[slot][0],
+        }
+        timed = any(key in ("month", "year") for key in keys)
+        distinct = [column for _, column, agg in specs if agg == "distinct"]
+
+        # Cells are in first-seen row order, so their groups come out in it too
+        totals: Dict[Any, List[Any]] = {}
+        for (region, product, slot), cell in self.cell_of.items():
+            if slot < 0 and timed:
+                continue
+            values = [decode[key](region, product, slot) for key in keys]
+            group = values[0] if len(keys) == 1 else tuple(values)
+
+            acc = totals.get(group)
+            if acc is None:
+                acc = totals[group] = [0, 0.0, 0, 0.0, {column: set() for column in distinct}]
+            acc[0] += self.rows[cell]
+            acc[1] += self.revenue[cell]
+            acc[2] += self.units_sold[cell]
+            acc[3] += self.unit_price[cell]
+            for column, seen in acc[4].items():
+                if column in ("region", "product") or slot >= 0:
+                    seen.add(decode[column](region, product, slot))
+
+        position = {"revenue": 1, "units_sold": 2, "unit_price": 3}
+        out: Dict[Any, Dict[str, Any]] = {}
+        for group, acc in totals.items():
+            values = {}
+            for label, column, agg in specs:
+                if agg == "count":
+                    values[label] = acc[0]
+                elif agg == "distinct":
+                    values[label] = len(acc[4][column])
+                elif agg == "sum":
+                    values[label] = acc[position[column]]
+                else:
+                    values[label] = acc[position[column]] / acc[0]
+            out[group] = values
+        return out
+
+
+# ---------------------------------------------------------
+# Binary Snapshots
+# ---------------------------------------------------------
+SNAPSHOT_MAGIC = b"SALESNAP"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot"
+_SNAPSHOT_PREAMBLE = struct.Struct("<8sII")  # magic, format version, header length
+_SNAPSHOT_COLUMNS = ("date_codes", "region_codes", "product_codes", "units_sold", "unit_price", "revenue")
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_fingerprint(csv_path: str) -> Dict[str, Any]:
+    st = os.stat(csv_path)
+    return {"path": csv_path, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": _file_sha256(csv_path)}
+
+
+def write_snapshot(
+    columns: SalesColumns,
+    path: str,
+    source: Dict[str, Any],
+    load_report: Optional[Dict[str, Any]] = None,
+    appended_rows: int = 0,
+) -> None:
+    """
+    Write `columns` as a binary snapshot.
+
+    Layout: preamble, a JSON header (source fingerprint, load report,
+    dictionaries and column offsets), then each typed column as raw bytes,
+    8-byte aligned.
+    The file is written to a temporary name and renamed into place.
+    """
+    blobs = [getattr(columns, name).tobytes() for name in _SNAPSHOT_COLUMNS]
+    header = {
+        "rows": len(columns),
+        "byteorder": sys.byteorder,
+        "source": source,
+        "load_report": load_report,
+        # Rows at the end that came from append() / append_csv(), not from the source CSV
+        "appended_rows": appended_rows,
+        "dictionaries": {
+            "dates": columns.dates.values,
+            "regions": columns.regions.values,
+            "products": columns.products.values,
+        },
+        "columns": [],
+    }
+
+    # Offsets depend on the header length, so lay the columns out relative to the data start
+    offset = 0
+    for name, blob in zip(_SNAPSHOT_COLUMNS, blobs):
+        column = getattr(columns, name)
+        header["columns"].append(
+            {"name": name, "typecode": column.typecode, "itemsize": column.itemsize, "offset": offset, "length": len(blob)}
+        )
+        offset += -(-len(blob) // 8) * 8
+
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    data_start = -(-(_SNAPSHOT_PREAMBLE.size + len(header_bytes)) // 8) * 8
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(_SNAPSHOT_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for meta, blob in zip(header["columns"], blobs):
+            f.seek(data_start + meta["offset"])
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot_header(path: str) -> Dict[str, Any]:
+    """The JSON header of a snapshot; ValueError if the file is not a complete, readable one."""
+    with open(path, "rb") as f:
+        preamble = f.read(_SNAPSHOT_PREAMBLE.size)
+        if len(preamble) != _SNAPSHOT_PREAMBLE.size:
+            raise ValueError(f"Snapshot is truncated: {path}")
+        magic, version, header_len = _SNAPSHOT_PREAMBLE.unpack(preamble)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"Not a version {SNAPSHOT_VERSION} sales snapshot: {path}")
+        header_bytes = f.read(header_len)
+        if len(header_bytes) != header_len:
+            raise ValueError(f"Snapshot is truncated: {path}")
+        header = json.loads(header_bytes)
+        if not isinstance(header, dict):
+            raise ValueError(f"Snapshot header is not an object: {path}")
+
+    header["data_start"] = -(-(_SNAPSHOT_PREAMBLE.size + header_len) // 8) * 8
+    return header
+
+
+def read_snapshot(path: str) -> Tuple[Dict[str, Any], SalesColumns]:
+    """Load a snapshot written by `write_snapshot`; the typed columns are copied straight out of an mmap."""
+    header = read_snapshot_header(path)
+    columns = SalesColumns()
+
+    for value in header["dictionaries"]["dates"]:
+        columns._encode_date(value)
+    for value in header["dictionaries"]["regions"]:
+        columns.regions.encode(value)
+    for value in header["dictionaries"]["products"]:
+        columns.products.encode(value)
+
+    data_start = header["data_start"]
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with memoryview(mm) as view:
+            for meta in header["columns"]:
+                column = array(meta["typecode"])
+                if column.itemsize != meta["itemsize"]:
+                    raise ValueError(f"Snapshot column {meta['name']} has an incompatible item size.")
+                start = data_start + meta["offset"]
+                column.frombytes(view[start:start + meta["length"]])
+                if header["byteorder"] != sys.byteorder:
+                    column.byteswap()
+                setattr(columns, meta["name"], column)
+
+    if any(len(getattr(columns, name)) != header["rows"] for name in _SNAPSHOT_COLUMNS):
+        raise ValueError(f"Snapshot is truncated: {path}")
+
+    columns.version = 1
+    return header, columns
+
+
+def snapshot_matches(header: Dict[str, Any], csv_path: str) -> bool:
+    """
+    True if the snapshot holds exactly the rows of the current `csv_path`.
+
+    Snapshots with appended rows never match (open those with
+    `load_snapshot`). A size mismatch rejects cheaply; otherwise the hash
+    decides, since a same-size rewrite can keep the mtime on filesystems
+    with coarse timestamps.
+    """
+    if header.get("appended_rows", 0):
+        return False
+    source = header["source"]
+    try:
+        st = os.stat(csv_path)
+    except OSError:
+        return False
+
+    if st.st_size != source["size"]:
+        return False
+    return _file_sha256(csv_path) == source["sha256"]
+
+
+# ---------------------------------------------------------
+# Query Result Cache
+# ---------------------------------------------------------
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"])
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache of query results.
+
+    Entries are tied to one `SalesColumns` object at one version; the first
+    lookup after the data changes (or is replaced) drops every entry.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be greater than 0.")
+
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[Any, Any]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._columns: Optional[SalesColumns] = None
+        self._version = -1
+
+    def lookup(self, columns: SalesColumns, key: Any) -> Tuple[bool, Any]:
+        with self.lock:
+            if columns is not self._columns or columns.version != self._version:
+                self.entries.clear()
+                self._columns, self._version = columns, columns.version
+
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, self.entries[key]
+
+            self.misses += 1
+            return False, None
+
+    def store(self, columns: SalesColumns, key: Any, value: Any) -> None:
+        with self.lock:
+            # Data changed while the value was being computed → don't keep it
+            if columns is not self._columns or columns.version != self._version:
+                return
+
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> CacheInfo:
+        with self.lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self.entries))
+
+
+def _cached(method):
+    """Memoize a `SalesAnalysis` query on (method, args) in the instance's `QueryCache`."""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self.cache
+        key = (method.__name__, args, frozenset(kwargs.items()))
+        try:
+            hash(key)
+        except TypeError:
+            cache = None
+        if cache is None:
+            return method(self, *args, **kwargs)
+
+        columns = self.columns
+        found, value = cache.lookup(columns, key)
+        if not found:
+            value = method(self, *args, **kwargs)
+            cache.store(columns, key, value)
+
+        # Callers get their own container so mutating it can't poison the cache
+        return copy(value) if isinstance(value, (dict, list)) else value
+
+    return wrapper
+
+
+# ---------------------------------------------------------
+# Row Validation
+# ---------------------------------------------------------
+# Validated rows are appended to the columns in batches of this many
+LOAD_BATCH_SIZE = 4096
+# Largest units_sold the int64 column can hold; bigger values are rejected as invalid_numeric
+MAX_UNITS_SOLD = 2 ** 63 - 1
+
+INVALID_ROW_MESSAGES = {
+    "empty_row": "Skipping empty row at line {idx}",
+    "missing_columns": "Invalid row at line {idx}: Missing columns → {row}",
+    "missing_product": "Skipping row (missing product) at line {idx}: {row}",
+    "missing_region": "Skipping row (missing region) at line {idx}: {row}",
+    "invalid_numeric": "Invalid numeric value at line {idx}: {row}",
+    "negative_units": "Negative units_sold at line {idx}: {row}",
+    "invalid_price": "Invalid or missing unit_price at line {idx}: {row}",
+    "unexpected_error": "Unexpected error at line {idx}: {row} → {error}",
+}
+
+
+# on_invalid(rule, line, row, error, fieldnames): `rule` is a key of INVALID_ROW_MESSAGES;
+# `row` is a DictReader-style dict, or the raw csv.reader fields when `fieldnames` is given
+InvalidRowHandler = Callable[[str, int, Any, Optional[Exception], Optional[List[str]]], None]
+
+
+def _log_invalid_row(
+    rule: str, idx: int, row: Any, error: Optional[Exception], fieldnames: Optional[List[str]] = None
+) -> None:
+    # Building and formatting the row dict is the expensive part; skip it when warnings are filtered out
+    if logging.root.isEnabledFor(logging.WARNING):
+        if fieldnames is not None and row is not None:
+            row = _row_dict(fieldnames, row)
+        logging.warning(INVALID_ROW_MESSAGES[rule].format(idx=idx, row=row, error=error))
+
+
+class LoadReport:
+    """
+    Ingestion health of a load, usable as the validators' `on_invalid` callback.
+
+    Counts rejections per rule (the keys of `INVALID_ROW_MESSAGES`) and keeps
+    the first `sample_size` offending line numbers of each. Warnings are only
+    formatted when emitted: at most `log_limit` per rule (None logs every
+    row), with the rest summed up by `finish()`.
+    """
+
+    def __init__(self, sample_size: int = 10, log_limit: Optional[int] = None):
+        if sample_size < 0:
+            raise ValueError("sample_size must be >= 0.")
+        if log_limit is not None and log_limit < 0:
+            raise ValueError("log_limit must be >= 0 or None.")
+
+        self.sample_size = sample_size
+        self.log_limit = log_limit
+        self.rows_loaded = 0
+        self.counts: Dict[str, int] = dict.fromkeys(INVALID_ROW_MESSAGES, 0)
+        self.samples: Dict[str, List[int]] = {rule: [] for rule in INVALID_ROW_MESSAGES}
+        self.suppressed = 0
+
+    def __call__(
+        self, rule: str, idx: int, row: Any, error: Any, fieldnames: Optional[List[str]] = None
+    ) -> None:
+        count = self.counts[rule] = self.counts[rule] + 1
+        if count <= self.sample_size:
+            self.samples[rule].append(idx)
+
+        if self.log_limit is None or count <= self.log_limit:
+            _log_invalid_row(rule, idx, row, error, fieldnames)
+        else:
+            self.suppressed += 1
+
+    @property
+    def rows_rejected(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def rows_read(self) -> int:
+        return self.rows_loaded + self.rows_rejected
+
+    def finish(self, rows_loaded: int) -> "LoadReport":
+        """Record the kept row count and log one summary of any suppressed warnings."""
+        self.rows_loaded = rows_loaded
+        if self.suppressed:
+            over = ", ".join(f"{rule}={n - self.log_limit}" for rule, n in self.counts.items() if n > self.log_limit)
+            logging.warning(f"Suppressed {self.suppressed} further invalid-row warnings ({over})")
+        return self
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rows_read": self.rows_read,
+            "rows_loaded": self.rows_loaded,
+            "rows_rejected": self.rows_rejected,
+            "counts": dict(self.counts),
+            "samples": {rule: list(lines) for rule, lines in self.samples.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LoadReport":
+        report = cls(sample_size=max(map(len, data["samples"].values()), default=0))
+        report.rows_loaded = data["rows_loaded"]
+        report.counts.update(data["counts"])
+        for rule, lines in data["samples"].items():
+            report.samples[rule] = list(lines)
+        return report
+
+
+def _as_csv_row(record: Union[SaleRecord, Dict[str, Any]]) -> Dict[str, Any]:
+    """Turn an appended record into the string-valued dict shape DictReader produces."""
+    if isinstance(record, SaleRecord):
+        record = asdict(record)
+    return {k: v if v is None or isinstance(v, str) else str(v) for k, v in record.items()}
+
+
+def _row_dict(fieldnames: List[str], fields: List[str]) -> Dict[Any, Any]:
+    """The dict csv.DictReader would build for `fields` (extras under None, missing fields None)."""
+    row: Dict[Any, Any] = dict(zip(fieldnames, fields))
+    if len(fields) > len(fieldnames):
+        row[None] = fields[len(fieldnames):]
+    else:
+        for key in fieldnames[len(fields):]:
+            row[key] = None
+    return row
+
+
+def _parse_byte_range(csv_path: str, start: int, end: int, fieldnames: List[str], keep_rows: Optional[int]):
+    """
+    Worker for the parallel loader: parse [start, end) of the file into a columnar chunk.
+
+    Only the first `keep_rows` rejected rows per rule (None = all) are sent
+    back with their fields; later ones can never be logged, so they are
+    returned as bare (rule, line) records instead of being pickled.
+    """
+    with open(csv_path, "rb") as f:
+        f.seek(start)
+        text = io.TextIOWrapper(io.BytesIO(f.read(end - start)))
+
+    rejected = []
+    per_rule: Dict[str, int] = {}
+
+    def on_invalid(rule, idx, row, error, row_fieldnames=None):
+        seen = per_rule[rule] = per_rule.get(rule, 0) + 1
+        if keep_rows is not None and seen > keep_rows:
+            row = None
+        rejected.append((rule, idx, row, row_fieldnames is not None, None if error is None else str(error)))
+
+    chunk = SalesColumns()
+    rows = SalesAnalysis._validate_fields(csv.reader(text), fieldnames, 0, on_invalid)
+    for batch in iter(lambda: list(islice(rows, LOAD_BATCH_SIZE)), []):
+        chunk.extend_rows(batch)
+
+    # every row read is either kept or rejected
+    return chunk, len(chunk) + len(rejected), rejected
+
+
+# ---------------------------------------------------------
+# Running Aggregates
+# ---------------------------------------------------------
+class SalesAggregates:
+    """
+    Running totals for the built-in metrics, updated one chunk of rows at a time.
+
+    Rows are folded in file order, so every result is identical to the one the
+    eager `SalesAnalysis` returns for the same file. `SalesAnalysis` keeps one
+    of these in step with its columns to answer the built-in metrics.
+    """
+
+    def __init__(self):
+        self.row_count = 0
+        self.revenue_total = 0.0
+        self.region_revenue: Dict[str, float] = {}
+        self.product_units: Dict[str, int] = {}
+        self.product_price_sum: Dict[str, float] = {}
+        self.product_price_count: Dict[str, int] = {}
+        self.month_revenue: Dict[Tuple[int, int], float] = {}
+        self._month_of_date: Dict[str, Optional[Tuple[int, int]]] = {}
+
+    def update(self, rows: Iterable[Tuple[str, str, str, int, float]]) -> None:
+        region_revenue = self.region_revenue
+        product_units = self.product_units
+        price_sum = self.product_price_sum
+        price_count = self.product_price_count
+        month_revenue = self.month_revenue
+        month_of_date = self._month_of_date
+
+        for date, region, product, units, price in rows:
+            revenue = units * price
+            self.row_count += 1
+            self.revenue_total += revenue
+            region_revenue[region] = region_revenue.get(region, 0.0) + revenue
+            product_units[product] = product_units.get(product, 0) + units
+            price_sum[product] = price_sum.get(product, 0.0) + price
+            price_count[product] = price_count.get(product, 0) + 1
+
+            if date not in month_of_date:
+                month_of_date[date] = _parse_year_month(date)
+            ym = month_of_date[date]
+            if ym is not None:
+                month_revenue[ym] = month_revenue.get(ym, 0.0) + revenue
+
+    def merge(self, other: "SalesAggregates") -> None:
+        """
+        Fold another instance's totals into this one, e.g. partials built by
+        separate workers. Float sums then depend on how rows were split, so
+        they can differ from a single file-order pass in the last bits.
+        """
+        self.row_count += other.row_count
+        self.revenue_total += other.revenue_total
+        for target, source in (
+            (self.region_revenue, other.region_revenue),
+            (self.product_units, other.product_units),
+            (self.product_price_sum, other.product_price_sum),
+            (self.product_price_count, other.product_price_count),
+            (self.month_revenue, other.month_revenue),
+        ):
+            for key, value in source.items():
+                target[key] = target.get(key, 0) + value
+        self._month_of_date.update(other._month_of_date)
+
+    def total_revenue(self) -> float:
+        return self.revenue_total
+
+    def revenue_by_region(self) -> Dict[str, float]:
+        return dict(self.region_revenue)
+
+    def units_sold_by_product(self) -> Dict[str, int]:
+        return dict(self.product_units)
+
+    def avg_unit_price_by_product(self) -> Dict[str, float]:
+        return {
+            product: total / self.product_price_count[product]
+            for product, total in self.product_price_sum.items()
+        }
+
+    def sales_trend(self) -> Dict[Tuple[int, int], float]:
+        return dict(self.month_revenue)
+
+
+DateBound = Union[str, datetime.date, None]
+
+
 class SalesAnalysis:
     REQUIRED_FIELDS = {"date", "region", "product", "units_sold", "unit_price"}
+    BUILTIN_METRICS = (
+        "total_revenue",
+        "revenue_by_region",
+        "units_sold_by_product",
+        "avg_unit_price_by_product",
+        "sales_trend",
+    )
+    # Built-in metric → its group_by as (key or None, column, aggregator)
+    _BUILTIN_GROUPS = {
+        "total_revenue": (None, "revenue", "sum"),
+        "revenue_by_region": ("region", "revenue", "sum"),
+        "units_sold_by_product": ("product", "units_sold", "sum"),
+        "avg_unit_price_by_product": ("product", "unit_price", "mean"),
+        "sales_trend": ("month", "revenue", "sum"),
+    }
+    # (keys, column, aggregator) → SalesAggregates method holding that group_by result
+    _MAINTAINED_GROUPS = {
+        ((), "revenue", "sum"): "total_revenue",
+        (("region",), "revenue", "sum"): "revenue_by_region",
+        (("product",), "units_sold", "sum"): "units_sold_by_product",
+        (("product",), "unit_price", "mean"): "avg_unit_price_by_product",
+        (("month",), "revenue", "sum"): "sales_trend",
+    }
 
-    def __init__(self, csv_path: str):
+    def __init__(
+        self,
+        csv_path: str,
+        workers: int = 1,
+        cache_size: int = 128,
+        revenue_index: bool = False,
+        snapshot_path: Optional[str] = None,
+        log_limit: Optional[int] = None,
+        rollup: bool = False,
+    ):
         self.csv_path = csv_path
-        self.data: List[SaleRecord] = self._load_csv()
+        self.snapshot_path = snapshot_path or csv_path + SNAPSHOT_SUFFIX
+
+        snapshot = self._load_valid_snapshot()
+        if snapshot is not None:
+            header, columns = snapshot
+            report = header.get("load_report")
+            load_report = None if report is None else LoadReport.from_dict(report)
+        else:
+            load_report = LoadReport(log_limit=log_limit)
+            if workers > 1:
+                columns = self._load_csv_parallel(workers, load_report)
+            else:
+                columns = self._load_csv(load_report)
+            load_report.finish(len(columns))
+
+        # Rows that mirror the CSV; anything past them was appended
+        self.csv_rows = len(columns)
+        self._attach(columns, cache_size, revenue_index, load_report, rollup)
+
+    def _attach(
+        self,
+        columns: SalesColumns,
+        cache_size: int,
+        revenue_index: bool,
+        load_report: Optional[LoadReport] = None,
+        rollup: bool = False,
+    ) -> None:
+        self.columns = columns
+        # Rejections of the CSV load (None for snapshots written without one)
+        self.load_report = load_report
+        self.cache: Optional[QueryCache] = QueryCache(cache_size) if cache_size > 0 else None
+        self.reducers: Dict[str, Tuple[Callable[[Any, SaleRecord], Any], Any, Optional[Callable[[Any], Any]]]] = {}
+
+        # Maintained aggregates: built on first use, then only fed new rows
+        self._aggregates = SalesAggregates()
+        self._aggregated_columns: Optional[SalesColumns] = None
+        self._aggregated_rows = 0
+        self._aggregates_lock = threading.Lock()
+
+        self._revenue_index: Optional[RevenueIndex] = None
+        if revenue_index:
+            self.build_revenue_index()
+
+        self._date_index: Optional[DateIndex] = None
+
+        self._rollup: Optional[RollupCube] = None
+        if rollup:
+            self.build_rollup()
+
+    @property
+    def data(self) -> SaleRecordView:
+        """Rows as `SaleRecord` objects, built lazily from the columns."""
+        return SaleRecordView(self.columns)
+
+    def cache_info(self) -> Optional[CacheInfo]:
+        """Hit/miss statistics of the query cache (None when caching is disabled)."""
+        return self.cache.info() if self.cache else None
+
+    def cache_clear(self) -> None:
+        if self.cache:
+            self.cache.clear()
+
+    @property
+    def aggregates(self) -> SalesAggregates:
+        """Running aggregates, caught up with any rows appended since the last call."""
+        with self._aggregates_lock:
+            columns = self.columns
+            if self._aggregated_columns is not columns:
+                self._aggregates = SalesAggregates()
+                self._aggregated_columns = columns
+                self._aggregated_rows = 0
+
+            if self._aggregated_rows < len(columns):
+                start = self._aggregated_rows
+                self._aggregated_rows = len(columns)
+                self._aggregates.update(columns.rows(start))
+
+            return self._aggregates
+
+    def build_revenue_index(self) -> RevenueIndex:
+        """Build (or catch up) the revenue-sorted index used by the threshold and top-K queries."""
+        index = self._revenue_index
+        if index is None or index.columns is not self.columns:
+            index = self._revenue_index = RevenueIndex(self.columns)
+        else:
+            index.refresh()
+        return index
+
+    def build_date_index(self) -> DateIndex:
+        """Build (or catch up) the month-partitioned index behind the `start=` / `end=` filters."""
+        index = self._date_index
+        if index is None or index.columns is not self.columns:
+            index = self._date_index = DateIndex(self.columns)
+        else:
+            index.refresh()
+        return index
+
+    def query(self) -> "SalesQuery":
+        """Start a lazy, chainable query (see `SalesQuery`)."""
+        return SalesQuery(self)
+
+    def build_rollup(self) -> RollupCube:
+        """
+        Build (or catch up) the (region, product, month) rollup. Once built,
+        unranged `group_by` calls it covers are answered from it, except the
+        shapes the maintained aggregates already hold (the built-in metrics).
+        """
+        cube = self._rollup
+        if cube is None or cube.columns is not self.columns:
+            cube = self._rollup = RollupCube(self.columns)
+        else:
+            cube.refresh()
+        return cube
+
+    def _rows_in_range(self, start, end) -> List[int]:
+        return self.build_date_index().rows_between(_date_key(start), _date_key(end))
+
+    def group_by(
+        self,
+        keys: Iterable[str],
+        metrics: Dict[str, Union[str, Iterable[str]]],
+        start: DateBound = None,
+        end: DateBound = None,
+    ) -> Dict[Any, Dict[str, Any]]:
+        """
+        Any combination of `GROUP_KEYS` and metrics in one aggregation pass,
+        e.g. `group_by(["region", "month"], {"revenue": "sum", "unit_price": "mean"})`.
+        See the module-level `group_by` for the result shape.
+        """
+        grouped = self._cached_group_by(tuple(keys), _metric_specs(metrics), start, end)
+        return {group: dict(values) for group, values in grouped.items()}
+
+    def _group_by(
+        self, keys: Tuple[str, ...], specs: Tuple[MetricSpec, ...], start: DateBound, end: DateBound
+    ) -> Dict[Any, Dict[str, Any]]:
+        if start is None and end is None and len(specs) == 1:
+            # Shapes the maintained aggregates already hold need no scan (and are
+            # summed in file order, so they match rollup=False and stream() exactly)
+            label, column, agg = specs[0]
+            maintained = self._MAINTAINED_GROUPS.get((keys, column, agg))
+            if maintained is not None:
+                aggregates = self.aggregates
+                if not keys:
+                    return {(): {label: aggregates.revenue_total}} if aggregates.row_count else {}
+                return {group: {label: value} for group, value in getattr(aggregates, maintained)().items()}
+
+        if start is None and end is None and self._rollup is not None and RollupCube.covers(keys, specs):
+            return self.build_rollup().group_by(keys, specs)
+
+        row_ids = None if start is None and end is None else self._rows_in_range(start, end)
+        return group_by(self.columns, keys, specs, row_ids)
+
+    # The built-in methods cache their own results, so only direct calls go through here
+    _cached_group_by = _cached(_group_by)
+
+    def _builtin_metric(
+        self, name: str, start: DateBound, end: DateBound, row_ids: Optional[List[int]] = None
+    ) -> Any:
+        """
+        A built-in metric in the shape its method returns, via `group_by`.
+        `row_ids` (the rows in [start, end]) lets `aggregate` share one range lookup.
+        """
+        key, column, agg = self._BUILTIN_GROUPS[name]
+        keys = () if key is None else (key,)
+        specs = ((column, column, agg),)
+        if row_ids is None:
+            grouped = self._group_by(keys, specs, start, end)
+        else:
+            grouped = group_by(self.columns, keys, specs, row_ids)
+
+        values = {group: metrics[column] for group, metrics in grouped.items()}
+        return values.get((), 0.0) if key is None else values
+
+    # Incremental Appends
+    def append(self, records: Iterable[Union[SaleRecord, Dict[str, Any]]]) -> int:
+        """
+        Validate and add a batch of rows; returns how many were accepted.
+
+        Rows are `SaleRecord`s or CSV-style dicts and go through the same rules
+        as `_load_csv`, with warnings numbered by position in the batch (from 1).
+        The maintained aggregates absorb the batch in O(batch).
+        """
+        columns = self.columns
+        accepted = 0
+        for date, region, product, units, price in self._validate_rows(
+            map(_as_csv_row, records), 1, _log_invalid_row
+        ):
+            columns.append(date, region, product, units, price)
+            accepted += 1
+        return accepted
+
+    def append_csv(self, csv_path: str) -> int:
+        """Validate and add every row of another CSV file; returns how many were accepted."""
+        columns = self.columns
+        before = len(columns)
+        for date, region, product, units, price in self._iter_rows(csv_path):
+            columns.append(date, region, product, units, price)
+        return len(columns) - before
+
+    # Snapshots
+    def _load_valid_snapshot(self) -> Optional[Tuple[Dict[str, Any], SalesColumns]]:
+        """(header, columns) from `self.snapshot_path` if it exists and still matches the CSV, else None."""
+        if not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            if not snapshot_matches(read_snapshot_header(self.snapshot_path), self.csv_path):
+                return None
+            return read_snapshot(self.snapshot_path)
+        except (OSError, ValueError, KeyError, TypeError, struct.error) as e:
+            logging.warning(f"Ignoring unreadable snapshot {self.snapshot_path}: {e}")
+            return None
+
+    def save_snapshot(self, path: Optional[str] = None) -> str:
+        """
+        Write the current columns to a binary snapshot (default: `<csv>.snapshot`).
+
+        Later `SalesAnalysis(csv_path)` calls load it instead of parsing the CSV
+        for as long as the CSV is unchanged. Appended rows are saved as well,
+        but then the snapshot no longer mirrors the CSV: the constructor skips
+        it and only `load_snapshot` opens it.
+        """
+        path = path or self.snapshot_path
+        report = None if self.load_report is None else self.load_report.as_dict()
+        write_snapshot(
+            self.columns, path, _source_fingerprint(self.csv_path), report, len(self.columns) - self.csv_rows
+        )
+        return path
+
+    @classmethod
+    def load_snapshot(
+        cls, path: str, cache_size: int = 128, revenue_index: bool = False, rollup: bool = False
+    ) -> "SalesAnalysis":
+        """Open a snapshot directly, without checking it against (or needing) the source CSV."""
+        header, columns = read_snapshot(path)
+        analysis = cls.__new__(cls)
+        analysis.csv_path = header["source"]["path"]
+        analysis.snapshot_path = path
+        analysis.csv_rows = header["rows"] - header.get("appended_rows", 0)
+        report = header.get("load_report")
+        report = None if report is None else LoadReport.from_dict(report)
+        analysis._attach(columns, cache_size, revenue_index, report, rollup)
+        return analysis
 
     # CSV Loader 
-    def _load_csv(self) -> List[SaleRecord]:
-        records = []
+    def _load_csv(self, on_invalid: InvalidRowHandler = _log_invalid_row) -> SalesColumns:
+        columns = SalesColumns()
+        rows = self._iter_rows(self.csv_path, on_invalid)
+        for batch in iter(lambda: list(islice(rows, LOAD_BATCH_SIZE)), []):
+            columns.extend_rows(batch)
+        return columns
 
-        with open(self.csv_path, "r") as f:
-            reader = csv.DictReader(f)
+    @classmethod
+    def _iter_rows(
+        cls,
+        csv_path: str,
+        on_invalid: InvalidRowHandler = _log_invalid_row,
+    ) -> Iterator[Tuple[str, str, str, int, float]]:
+        """Yield validated (date, region, product, units_sold, unit_price) tuples, reporting bad rows to `on_invalid`."""
+        with open(csv_path, "r") as f:
+            reader = csv.reader(f)
+            fieldnames = next(reader, None)
+            if fieldnames is not None:
+                yield from cls._validate_fields(reader, fieldnames, 2, on_invalid)
 
-            for idx, row in enumerate(reader, start=2):
-                try:
-                    if all(not (v or "").strip() for v in row.values()):
-                        logging.warning(f"Skipping empty row at line {idx}")
-                        continue
+    @classmethod
+    def _validate_fields(
+        cls,
+        reader: Iterable[List[str]],
+        fieldnames: List[str],
+        start: int,
+        on_invalid: InvalidRowHandler,
+    ) -> Iterator[Tuple[str, str, str, int, float]]:
+        """
+        Fast path of `_validate_rows` for csv.reader rows (lists) under `fieldnames`.
 
-                    if not self.REQUIRED_FIELDS.issubset(row.keys()):
-                        logging.warning(f"Invalid row at line {idx}: Missing columns → {row}")
-                        continue
+        Column positions are resolved once from the header and rows are never
+        turned into dicts: a rejected row is reported as its raw fields plus
+        `fieldnames`, and `_log_invalid_row` builds the dict csv.DictReader
+        would have produced only if it emits a warning. Rules, their order,
+        line numbering (blank lines skipped) and messages are the same.
+        """
+        if not cls.REQUIRED_FIELDS.issubset(fieldnames):
+            # Every row fails `missing_columns` (or an earlier rule): keep the dict path
+            rows = (_row_dict(fieldnames, fields) for fields in reader if fields)
+            yield from cls._validate_rows(rows, start, on_invalid)
+            return
 
-                    if not row["product"]:
-                        logging.warning(f"Skipping row (missing product) at line {idx}: {row}")
-                        continue
+        # Like DictReader, a repeated column name maps to its LAST position
+        position = {name: i for i, name in enumerate(fieldnames)}
+        p_date, p_region, p_product = position["date"], position["region"], position["product"]
+        p_units, p_price = position["units_sold"], position["unit_price"]
+        width = len(fieldnames)
+        distinct = sorted(position.values())
 
-                    if not row["region"]:
-                        logging.warning(f"Skipping row (missing region) at line {idx}: {row}")
-                        continue
+        idx = start - 1
+        for fields in reader:
+            if not fields:
+                continue  # DictReader skips blank lines without counting them
+            idx += 1
 
-                    try:
-                        units = int(row["units_sold"])
-                        price = float(row["unit_price"])
-                    except Exception:
-                        logging.warning(f"Invalid numeric value at line {idx}: {row}")
-                        continue
+            try:
+                n = len(fields)
+                if n >= width:
+                    date, region, product = fields[p_date], fields[p_region], fields[p_product]
+                    units_text, price_text = fields[p_units], fields[p_price]
+                else:
+                    date = fields[p_date] if p_date < n else None
+                    region = fields[p_region] if p_region < n else None
+                    product = fields[p_product] if p_product < n else None
+                    units_text = fields[p_units] if p_units < n else None
+                    price_text = fields[p_price] if p_price < n else None
 
-                    if units < 0:
-                        logging.warning(f"Negative units_sold at line {idx}: {row}")
+                # A non-blank product already proves the row isn't empty
+                if not product or product.isspace():
+                    if all(not (fields[p] if p < n else "").strip() for p in distinct):
+                        if n > width:
+                            # The dict path's blank check calls .strip() on DictReader's list of
+                            # extra fields and fails, so blank rows with extras have always been
+                            # reported as unexpected errors; keep that, with the same message
+                            error = AttributeError("'list' object has no attribute 'strip'")
+                            on_invalid("unexpected_error", idx, fields, error, fieldnames)
+                        else:
+                            on_invalid("empty_row", idx, fields, None, fieldnames)
                         continue
 
-                    if price <= 0:
-                        logging.warning(f"Invalid or missing unit_price at line {idx}: {row}")
-                        continue
+                if not product:
+                    on_invalid("missing_product", idx, fields, None, fieldnames)
+                    continue
+
+                if not region:
+                    on_invalid("missing_region", idx, fields, None, fieldnames)
+                    continue
+
+                try:
+                    units = int(units_text)
+                    if units > MAX_UNITS_SOLD:
+                        raise OverflowError("units_sold does not fit the int64 column")
+                    price = float(price_text)
+                except Exception:
+                    on_invalid("invalid_numeric", idx, fields, None, fieldnames)
+                    continue
+
+                if units < 0:
+                    on_invalid("negative_units", idx, fields, None, fieldnames)
+                    continue
+
+                if price <= 0:
+                    on_invalid("invalid_price", idx, fields, None, fieldnames)
+                    continue
+
+                yield date, region, product, units, price
 
-                    record = SaleRecord(
-                        date=row["date"],
-                        region=row["region"],
-                        product=row["product"],
-                        units_sold=units,
-                        unit_price=price,
-                    )
-                    records.append(record)
+            except Exception as e:
+                on_invalid("unexpected_error", idx, fields, e, fieldnames)
 
-                except Exception as e:
-                    logging.warning(f"Unexpected error at line {idx}: {row} → {e}")
+    @classmethod
+    def _validate_rows(
+        cls,
+        rows: Iterable[Dict[str, Any]],
+        start: int,
+        on_invalid: InvalidRowHandler,
+    ) -> Iterator[Tuple[str, str, str, int, float]]:
+        """
+        Apply the loader's validation rules to DictReader rows numbered from `start`.
 
-        return records
+        Every rejected row is reported as `on_invalid(rule, line, row, error)`,
+        where `rule` is a key of `INVALID_ROW_MESSAGES`.
+        """
+        for idx, row in enumerate(rows, start=start):
+            try:
+                if all(not (v or "").strip() for v in row.values()):
+                    on_invalid("empty_row", idx, row, None)
+                    continue
+
+                if not cls.REQUIRED_FIELDS.issubset(row.keys()):
+                    on_invalid("missing_columns", idx, row, None)
+                    continue
+
+                if not row["product"]:
+                    on_invalid("missing_product", idx, row, None)
+                    continue
+
+                if not row["region"]:
+                    on_invalid("missing_region", idx, row, None)
+                    continue
+
+                try:
+                    units = int(row["units_sold"])
+                    if units > MAX_UNITS_SOLD:
+                        raise OverflowError("units_sold does not fit the int64 column")
+                    price = float(row["unit_price"])
+                except Exception:
+                    on_invalid("invalid_numeric", idx, row, None)
+                    continue
+
+                if units < 0:
+                    on_invalid("negative_units", idx, row, None)
+                    continue
+
+                if price <= 0:
+                    on_invalid("invalid_price", idx, row, None)
+                    continue
+
+                yield row["date"], row["region"], row["product"], units, price
+
+            except Exception as e:
+                on_invalid("unexpected_error", idx, row, e)
+
+    # Parallel Loader
+    def _load_csv_parallel(
+        self, workers: int, on_invalid: InvalidRowHandler = _log_invalid_row
+    ) -> SalesColumns:
+        """
+        Parse newline-aligned byte ranges of the file in worker processes.
+
+        Each worker returns a `SalesColumns` chunk plus its rejected rows
+        numbered from 0; chunks are merged in file order and the warnings are
+        re-numbered with the row counts of the preceding chunks, so the result
+        and the log match `_load_csv`. Quoted fields must not contain newlines.
+        """
+        with open(self.csv_path, "rb") as f:
+            header = f.readline()
+            data_start = f.tell()
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+
+            bounds = [data_start]
+            for i in range(1, workers):
+                f.seek(max(data_start + (size - data_start) * i // workers, bounds[-1]))
+                if f.tell() > data_start:
+                    f.readline()
+                bounds.append(max(f.tell(), bounds[-1]))
+            bounds.append(size)
+
+        fieldnames = next(csv.reader(io.TextIOWrapper(io.BytesIO(header))), [])
+        ranges = [(lo, hi) for lo, hi in zip(bounds, bounds[1:]) if hi > lo]
+
+        # Rows that can never reach a warning aren't shipped back from the workers
+        if not logging.root.isEnabledFor(logging.WARNING):
+            keep_rows: Optional[int] = 0
+        else:
+            keep_rows = on_invalid.log_limit if isinstance(on_invalid, LoadReport) else None
+
+        columns = SalesColumns()
+        line = 2
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_parse_byte_range, self.csv_path, lo, hi, fieldnames, keep_rows) for lo, hi in ranges
+            ]
+            for future in futures:
+                chunk, row_count, rejected = future.result()
+                for rule, idx, row, raw, error in rejected:
+                    on_invalid(rule, line + idx, row, error, fieldnames if raw else None)
+                columns.extend(chunk)
+                line += row_count
+
+        return columns
+
+    # Streaming Loader
+    @classmethod
+    def stream(
+        cls, csv_path: str, chunk_size: int = 10_000, report: Optional[LoadReport] = None
+    ) -> Iterator[SalesAggregates]:
+        """
+        Fold the CSV into running aggregates `chunk_size` rows at a time.
+
+        Yields the same `SalesAggregates` object after each chunk; the last one
+        yielded covers the whole file. Only one chunk of rows is held in memory.
+        Rejected rows go to `report` when one is given.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be greater than 0.")
+
+        aggregates = SalesAggregates()
+        rows = cls._iter_rows(csv_path, _log_invalid_row if report is None else report)
+        chunk = list(islice(rows, chunk_size))
+        yield_empty = not chunk
+
+        while chunk:
+            aggregates.update(chunk)
+            if report is not None:
+                report.rows_loaded += len(chunk)
+            yield aggregates
+            chunk = list(islice(rows, chunk_size))
+
+        if report is not None:
+            report.finish(report.rows_loaded)
+        if yield_empty:
+            yield aggregates
 
     # ---------------------------------------------------------
     # 1. Total revenue 
     # ---------------------------------------------------------
-    def total_revenue(self) -> float:
-        return reduce(lambda acc, r: acc + r.revenue, self.data, 0.0)
+    @_cached
+    def total_revenue(self, start: DateBound = None, end: DateBound = None) -> float:
+        return self._builtin_metric("total_revenue", start, end)
 
     # ---------------------------------------------------------
     # 2. Revenue by region 
     # ---------------------------------------------------------
-    def revenue_by_region(self) -> Dict[str, float]:
-        def reducer(acc: Dict[str, float], r: SaleRecord) -> Dict[str, float]:
-            acc[r.region] = acc.get(r.region, 0.0) + r.revenue
-            return acc
-        return reduce(reducer, self.data, {})
+    @_cached
+    def revenue_by_region(self, start: DateBound = None, end: DateBound = None) -> Dict[str, float]:
+        return self._builtin_metric("revenue_by_region", start, end)
 
     # ---------------------------------------------------------
     # 3. Units sold by product 
     # ---------------------------------------------------------
-    def units_sold_by_product(self) -> Dict[str, int]:
-        def reducer(acc: Dict[str, int], r: SaleRecord) -> Dict[str, int]:
-            acc[r.product] = acc.get(r.product, 0) + r.units_sold
-            return acc
-        return reduce(reducer, self.data, {})
+    @_cached
+    def units_sold_by_product(self, start: DateBound = None, end: DateBound = None) -> Dict[str, int]:
+        return self._builtin_metric("units_sold_by_product", start, end)
 
     # ---------------------------------------------------------
     # 4. Filter sales by revenue threshold 
     # ---------------------------------------------------------
-    def filter_sales_by_revenue(self, threshold: float) -> List[SaleRecord]:
-        return list(filter(lambda r: r.revenue >= threshold, self.data))
+    # Record-returning queries cache only their row ids (8 bytes a row) and
+    # build the SaleRecords per call, so a broad filter can't pin the table as objects
+    def filter_sales_by_revenue(
+        self, threshold: float, start: DateBound = None, end: DateBound = None
+    ) -> List[SaleRecord]:
+        return self._records(self._rows_at_least(threshold, start, end))
+
+    def top_k_by_revenue(self, k: int) -> List[SaleRecord]:
+        return self._records(self._top_rows(k))
+
+    def bottom_k_by_revenue(self, k: int) -> List[SaleRecord]:
+        return self._records(self._bottom_rows(k))
+
+    def sales_in_revenue_range(self, low: float, high: float) -> List[SaleRecord]:
+        """Sales with low <= revenue <= high, in file order."""
+        return self._records(self._rows_between(low, high))
+
+    def _records(self, row_ids: Iterable[int]) -> List[SaleRecord]:
+        return list(map(self.columns.record, row_ids))
+
+    @_cached
+    def _rows_at_least(self, threshold: float, start: DateBound, end: DateBound) -> array:
+        cols = self.columns
+        revenue = cols.revenue
+        if start is not None or end is not None:
+            return array("q", (i for i in self._rows_in_range(start, end) if revenue[i] >= threshold))
+        if self._revenue_index is not None:
+            return array("q", self.build_revenue_index().at_least(threshold))
+        return array("q", (i for i, rev in enumerate(revenue) if rev >= threshold))
+
+    @_cached
+    def _top_rows(self, k: int) -> array:
+        return array("q", self.build_revenue_index().top(k))
+
+    @_cached
+    def _bottom_rows(self, k: int) -> array:
+        return array("q", self.build_revenue_index().bottom(k))
+
+    @_cached
+    def _rows_between(self, low: float, high: float) -> array:
+        return array("q", self.build_revenue_index().between(low, high))
 
     # ---------------------------------------------------------
     # 5. Average unit price per product 
     # ---------------------------------------------------------
-    def avg_unit_price_by_product(self) -> Dict[str, float]:
-        def reducer(acc: Dict[str, Tuple[float, int]], r: SaleRecord):
-            total, cnt = acc.get(r.product, (0.0, 0))
-            acc[r.product] = (total + r.unit_price, cnt + 1)
-            return acc
-
-        sums_counts = reduce(reducer, self.data, {})
-
-        return {
-            product: total / count
-            for product, (total, count) in sums_counts.items()
-            if count > 0
-        }
+    @_cached
+    def avg_unit_price_by_product(self, start: DateBound = None, end: DateBound = None) -> Dict[str, float]:
+        return self._builtin_metric("avg_unit_price_by_product", start, end)
 
     # ---------------------------------------------------------
     # 6. Custom Higher-Order Query Executor
     # ---------------------------------------------------------
-    def run_query(self, query_fn: Callable[[List[SaleRecord]], Any]):
+    def run_query(self, query_fn: Callable[[Sequence[SaleRecord]], Any]):
         return query_fn(self.data)
 
     # ---------------------------------------------------------
     # 7. sales trend grouped by (year, month) 
     # ---------------------------------------------------------
-    def sales_trend(self) -> Dict[Tuple[int, int], float]:
-        def extract_year_month(record: SaleRecord):
-            try:
-                year, month, _ = record.date.split("-")
-                return int(year), int(month)
-            except Exception:
-                return None
-
-        def reducer(acc: Dict[Tuple[int, int], float], r: SaleRecord):
-            ym = extract_year_month(r)
-            if ym is None:
-                return acc
-            acc[ym] = acc.get(ym, 0.0) + r.revenue
-            return acc
-
-        return reduce(reducer, self.data, {})
+    @_cached
+    def sales_trend(self, start: DateBound = None, end: DateBound = None) -> Dict[Tuple[int, int], float]:
+        return self._builtin_metric("sales_trend", start, end)
 
     # ---------------------------------------------------------
     # 8. month-over-month % change 
@@ -176,6 +1756,271 @@ class SalesAnalysis:
         return dict(filter(None, map(compute_change, consecutive_pairs)))
 
 
+    # ---------------------------------------------------------
+    # 9. Fused multi-metric aggregation (single pass)
+    # ---------------------------------------------------------
+    def register_reducer(
+        self,
+        name: str,
+        reducer: Callable[[Any, SaleRecord], Any],
+        initial: Any,
+        finalize: Optional[Callable[[Any], Any]] = None,
+    ) -> None:
+        """
+        Make `name` available to `aggregate`. The metric is computed like
+        `reduce(reducer, self.data, deepcopy(initial))`, then passed through
+        `finalize` if one is given.
+        """
+        if name in self.BUILTIN_METRICS:
+            raise ValueError(f"'{name}' is a built-in metric.")
+        self.reducers[name] = (reducer, initial, finalize)
+
+    def aggregate(self, metrics: Iterable[str], start: DateBound = None, end: DateBound = None) -> Dict[str, Any]:
+        """
+        Evaluate any mix of built-in and registered metrics together.
+
+        Built-in metrics come from the maintained aggregates; with `start` /
+        `end` several of them are folded together in one pass over the rows
+        in range (a single one is a `group_by` like its method). All
+        registered reducers share one scan of the rows. `start` / `end`
+        restrict every metric to that (inclusive) date range.
+        """
+        metrics = list(dict.fromkeys(metrics))
+        unknown = [m for m in metrics if m not in self.BUILTIN_METRICS and m not in self.reducers]
+        if unknown:
+            raise ValueError(f"Unknown metric(s): {', '.join(unknown)}")
+
+        ranged = start is not None or end is not None
+        row_ids = self._rows_in_range(start, end) if ranged else None
+
+        builtins = [name for name in metrics if name in self.BUILTIN_METRICS]
+        if ranged and len(builtins) == 1:
+            results: Dict[str, Any] = {builtins[0]: self._builtin_metric(builtins[0], start, end, row_ids)}
+        else:
+            if ranged:
+                aggregates = SalesAggregates()
+                aggregates.update(self.columns.rows_at(row_ids))
+            else:
+                aggregates = self.aggregates
+            results = {name: getattr(aggregates, name)() for name in builtins}
+
+        custom = [(name, *self.reducers[name]) for name in metrics if name in self.reducers]
+        if custom:
+            accs = [deepcopy(initial) for _, _, initial, _ in custom]
+            records = map(self.columns.record, row_ids) if ranged else self.data
+            for record in records:
+                for j, (_, reducer, _, _) in enumerate(custom):
+                    accs[j] = reducer(accs[j], record)
+
+            for (name, _, _, finalize), acc in zip(custom, accs):
+                results[name] = finalize(acc) if finalize else acc
+
+        return {name: results[name] for name in metrics}
+
+# ---------------------------------------------------------
+# Lazy Query Builder
+# ---------------------------------------------------------
+class SalesQuery:
+    """
+    Lazy, chainable query over a `SalesAnalysis`, e.g.
+    `analysis.query().where(region="North").where_revenue_gte(500).group_by("product").sum("units_sold")`.
+
+    Builder methods return a new query and only record the plan; terminal
+    methods (`sum`, `count`, `agg`, `records`, ...) run it. The most selective
+    indexed predicate picks the candidate rows (the DateIndex for dates, the
+    RevenueIndex for revenue once it is built), equality predicates compare
+    dictionary codes, and all remaining predicates are fused into one lazy
+    filter over row ids that feeds the group-by engine or the record view.
+    No intermediate record lists are built.
+    """
+
+    DIMENSIONS = ("date", "region", "product")
+    # Use an index only if it leaves at most 1/INDEX_SELECTIVITY of the rows
+    INDEX_SELECTIVITY = 4
+
+    def __init__(self, analysis: "SalesAnalysis"):
+        self.analysis = analysis
+        self.equals: Dict[str, frozenset] = {}
+        self.revenue_range: Tuple[float, float] = (-math.inf, math.inf)
+        self.date_range: Tuple[int, int] = (0, 99999999)  # YYYYMMDD keys
+        self.dated = False
+        self.keys: Tuple[str, ...] = ()
+
+    def _with(self, **changes: Any) -> "SalesQuery":
+        query = copy(self)
+        query.__dict__.update(changes)
+        return query
+
+    # Builders
+    def where(self, **conditions: Union[str, Iterable[str]]) -> "SalesQuery":
+        """Keep rows whose date / region / product equals the value (or is in the iterable)."""
+        equals = dict(self.equals)
+        for column, wanted in conditions.items():
+            if column not in self.DIMENSIONS:
+                raise ValueError(f"where() filters on {', '.join(self.DIMENSIONS)}; got '{column}'.")
+            values = frozenset([wanted] if isinstance(wanted, str) else wanted)
+            equals[column] = equals[column] & values if column in equals else values
+        return self._with(equals=equals)
+
+    def where_revenue_between(self, low: float, high: float) -> "SalesQuery":
+        """Keep rows with low <= revenue <= high."""
+        lo, hi = self.revenue_range
+        return self._with(revenue_range=(max(lo, float(low)), min(hi, float(high))))
+
+    def where_revenue_gte(self, threshold: float) -> "SalesQuery":
+        return self.where_revenue_between(threshold, math.inf)
+
+    def where_revenue_lte(self, threshold: float) -> "SalesQuery":
+        return self.where_revenue_between(-math.inf, threshold)
+
+    def where_date_between(self, start: DateBound = None, end: DateBound = None) -> "SalesQuery":
+        """Keep rows dated within [start, end] (inclusive, None = open); undated rows drop out."""
+        lo, hi = self.date_range
+        start, end = _date_key(start), _date_key(end)
+        return self._with(
+            date_range=(lo if start is None else max(lo, start), hi if end is None else min(hi, end)),
+            dated=True,
+        )
+
+    def group_by(self, *keys: str) -> "SalesQuery":
+        unknown = [key for key in keys if key not in GROUP_KEYS]
+        if unknown:
+            raise ValueError(f"Unknown group key(s): {', '.join(unknown)}")
+        return self._with(keys=tuple(keys))
+
+    # Planning
+    def _plan(self) -> Tuple[Optional[Iterable[int]], List[str]]:
+        """(row ids in file order, or None for every row; a description of each step)."""
+        analysis = self.analysis
+        cols = analysis.columns
+        steps: List[str] = []
+
+        # Equality predicates are resolved to dictionary codes; a value never seen matches nothing
+        tests: List[Tuple[str, Callable[[int], bool], Callable[[], Iterable[bool]]]] = []
+        for column, values in self.equals.items():
+            known = getattr(cols, f"{column}s").codes
+            wanted = frozenset(known[v] for v in values if v in known)
+            if not wanted:
+                return [], [f"{column}: no such value"]
+            codes = getattr(cols, f"{column}_codes")
+            tests.append((
+                column,
+                lambda i, codes=codes, wanted=wanted: codes[i] in wanted,
+                lambda codes=codes, wanted=wanted: map(wanted.__contains__, codes),
+            ))
+
+        lo, hi = self.revenue_range
+        filtered_revenue = (lo, hi) != (-math.inf, math.inf)
+        if filtered_revenue:
+            revenue = cols.revenue
+            if hi == math.inf:
+                revenue_mask = lambda: map(lo.__le__, revenue)
+            elif lo == -math.inf:
+                revenue_mask = lambda: map(hi.__ge__, revenue)
+            else:
+                revenue_mask = lambda: (lo <= r <= hi for r in revenue)
+            tests.append(("revenue", lambda i: lo <= revenue[i] <= hi, revenue_mask))
+
+        d_lo, d_hi = self.date_range
+        if self.dated:
+            day_of_date, date_codes = cols.day_of_date, cols.date_codes
+            tests.append((
+                "date_range",
+                lambda i: d_lo <= day_of_date[date_codes[i]] <= d_hi,
+                lambda: (d_lo <= day <= d_hi for day in map(day_of_date.__getitem__, date_codes)),
+            ))
+
+        if not tests:
+            return None, ["scan"]
+
+        # Candidates from whichever index leaves fewer rows
+        access: List[Tuple[int, str, Callable[[], List[int]]]] = []
+        if self.dated:
+            index = analysis.build_date_index()
+            months = index.months[bisect_left(index.months, d_lo // 100):bisect_right(index.months, d_hi // 100)]
+            access.append((
+                sum(len(index.partitions[m]) for m in months),
+                "date_range",
+                lambda: index.rows_between(d_lo, d_hi),
+            ))
+        if filtered_revenue and analysis._revenue_index is not None:
+            rev_index = analysis.build_revenue_index()
+            access.append((
+                bisect_right(rev_index.revenue, hi) - bisect_left(rev_index.revenue, lo),
+                "revenue",
+                lambda: rev_index.between(lo, hi),
+            ))
+
+        # An index only pays off when it skips most rows (its ids are re-sorted into file order)
+        access = [option for option in access if option[0] * self.INDEX_SELECTIVITY <= len(cols)]
+        if access:
+            _, driver, lookup = min(access, key=itemgetter(0))
+            ids: Iterable[int] = lookup()
+            steps.append(f"index({driver})")
+        else:
+            # No index applies: the first predicate scans its column in one C-level pass
+            driver, _, mask = tests[0]
+            ids = compress(range(len(cols)), mask())
+            steps.append(f"scan({driver})")
+
+        rest = [(name, test) for name, test, _ in tests if name != driver]
+        for _, test in rest:
+            ids = filter(test, ids)
+        if rest:
+            steps.append(f"filter({', '.join(name for name, _ in rest)})")
+        return ids, steps
+
+    def explain(self) -> str:
+        """The access path and steps the query would run, e.g. `index(date_range) → filter(region) → group_by(product)`."""
+        _, steps = self._plan()
+        if self.keys:
+            steps.append(f"group_by({', '.join(self.keys)})")
+        return " → ".join(steps)
+
+    # Terminals
+    def agg(self, metrics: Dict[str, Union[str, Iterable[str]]]) -> Dict[Any, Any]:
+        """Run the plan into the group-by engine: `{group: {label: value}}`, or `{label: value}` ungrouped."""
+        ids, _ = self._plan()
+        if ids is None:
+            grouped = self.analysis.group_by(self.keys, metrics)
+        else:
+            grouped = group_by(self.analysis.columns, self.keys, metrics, list(ids))
+        return grouped if self.keys else grouped.get((), {})
+
+    def _metric(self, column: str, agg: str, empty: Any) -> Any:
+        result = self.agg({column: agg})
+        if self.keys:
+            return {group: values[column] for group, values in result.items()}
+        return result.get(column, empty)
+
+    def sum(self, column: str) -> Any:
+        return self._metric(column, "sum", 0)
+
+    def mean(self, column: str) -> Any:
+        return self._metric(column, "mean", None)
+
+    def min(self, column: str) -> Any:
+        return self._metric(column, "min", None)
+
+    def max(self, column: str) -> Any:
+        return self._metric(column, "max", None)
+
+    def distinct(self, column: str) -> Any:
+        return self._metric(column, "distinct", 0)
+
+    def count(self) -> Any:
+        return self._metric("revenue", "count", 0)
+
+    def records(self) -> Iterator[SaleRecord]:
+        """Matching rows as `SaleRecord`s, built one at a time in file order."""
+        ids, _ = self._plan()
+        cols = self.analysis.columns
+        return map(cols.record, range(len(cols)) if ids is None else ids)
+
+    def __iter__(self) -> Iterator[SaleRecord]:
+        return self.records()
+
+
 # ---------------------------------------------------------
 # Logging 
 # ---------------------------------------------------------
@@ -216,25 +2061,27 @@ if __name__ == "__main__":
 
     print_section("SALES ANALYSIS REPORT")
 
+    report = analysis.aggregate(SalesAnalysis.BUILTIN_METRICS)
+
     print_section("1. Total Revenue")
-    print(f"${analysis.total_revenue():,.2f}")
+    print(f"${report['total_revenue']:,.2f}")
 
     print_section("2. Revenue by Region")
-    print_dict_table(analysis.revenue_by_region(), "Region", "Revenue ($)")
+    print_dict_table(report["revenue_by_region"], "Region", "Revenue ($)")
     
     print_section("3. Units Sold by Product")
-    print_dict_table(analysis.units_sold_by_product(), "Product", "Units Sold")
+    print_dict_table(report["units_sold_by_product"], "Product", "Units Sold")
 
     print_section("4. High Revenue Sales (>= $500)")
     high_rev = analysis.filter_sales_by_revenue(500)
     print_sales_list(high_rev)
 
     print_section("5. Average Unit Price by Product")
-    avg_prices = {k: f"${v:,.2f}" for k, v in analysis.avg_unit_price_by_product().items()}
+    avg_prices = {k: f"${v:,.2f}" for k, v in report["avg_unit_price_by_product"].items()}
     print_dict_table(avg_prices, "Product", "Avg Price")
 
     print_section("6. Sales Trend (Revenue by Month)")
-    trend = analysis.sales_trend()
+    trend = report["sales_trend"]
     trend_fmt = {f"{y}-{m:02d}": f"${v:,.2f}" for (y, m), v in trend.items()}
     print_dict_table(trend_fmt, "Month", "Revenue")
 
@@ -244,7 +2091,7 @@ if __name__ == "__main__":
     print_dict_table(mom_fmt, "Month", "% Change")
 
     print_section("8. Top Revenue Item")
-    top_item = analysis.run_query(lambda rows: max(rows, key=lambda r: r.revenue))
+    top_item = analysis.top_k_by_revenue(1)[0]
     print_single_sale(top_item)
 
     
@@ -0,0 +1,70 @@
+import threading
+from itertools import islice
+from typing import Iterator, List, Tuple
+
+from assignment1.producer_consumer import SENTINEL, BlockingQueue, Consumer, Producer
+from assignment2.sales_analysis import SalesAggregates, SalesAnalysis
+
+
+Row = Tuple[str, str, str, int, float]
+
+
+def _chunks(rows: Iterator[Row], chunk_size: int) -> Iterator[List[Row]]:
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def aggregate_csv(
+    csv_path: str,
+    consumers: int = 2,
+    queue_size: int = 8,
+    chunk_size: int = 5_000,
+) -> SalesAggregates:
+    """
+    Stream a sales CSV through a producer-consumer pipeline into running aggregates.
+
+    A reader thread (Producer) parses and validates rows with the same rules
+    and warnings as SalesAnalysis, and queues them in chunks of `chunk_size`.
+    `consumers` aggregator threads each fold chunks into their own
+    SalesAggregates. The partials are merged at the end. Parsing overlaps
+    with aggregation, and at most about (queue_size + consumers + 1) *
+    chunk_size rows are in memory at once.
+
+    With consumers=1 the totals are identical to SalesAnalysis. With more
+    consumers, float sums can differ in the last bits (see SalesAggregates.merge).
+    An error while reading the CSV (e.g. a missing file) is re-raised once
+    the threads have finished, as SalesAnalysis would raise it.
+    """
+    if consumers <= 0:
+        raise ValueError("consumers must be greater than 0.")
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be greater than 0.")
+
+    queue: BlockingQueue[List[Row]] = BlockingQueue(max_size=queue_size)
+    partials = [SalesAggregates() for _ in range(consumers)]
+
+    reader = Producer(_chunks(SalesAnalysis._iter_rows(csv_path), chunk_size), queue, SENTINEL, sentinels=consumers)
+    aggregators = [Consumer(queue, partial.update, SENTINEL) for partial in partials]
+
+    threads: List[threading.Thread] = [*aggregators, reader]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if reader.error is not None:
+        # Otherwise a failed read would look like a short file
+        raise reader.error
+
+    result = partials[0]
+    for partial in partials[1:]:
+        result.merge(partial)
+    return result
+
+
+if __name__ == "__main__":
+    aggregates = aggregate_csv("data/sales_large.csv")
+    print(f"Rows:          {aggregates.row_count}")
+    print(f"Total revenue: {aggregates.total_revenue():.2f}")
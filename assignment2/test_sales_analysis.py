@@ -1,7 +1,8 @@
+import datetime
 import os
 import csv
 import pytest
-from assignment2.sales_analysis import SalesAnalysis, SaleRecord
+from assignment2.sales_analysis import RevenueIndex, SalesAnalysis, SaleRecord, SalesColumns, _parse_byte_range, _row_dict
 
 
 
@@ -57,6 +58,21 @@ def test_loader_skips_invalid_rows(tmp_path):
     assert analysis.data[0].product == "Keyboard"
 
 
+def test_loader_rejects_units_beyond_int64(tmp_path, caplog):
+    rows = [
+        ["2024-01-01", "North", "Keyboard", "99999999999999999999", "1"],    # overflows int64
+        ["2024-01-02", "South", "Mouse", str(2 ** 63 - 1), "1"],             # largest that fits
+    ]
+    csv_path = write_temp_csv(tmp_path, "huge.csv", rows)
+    with caplog.at_level("WARNING"):
+        analysis = SalesAnalysis(csv_path)
+
+    assert [r.product for r in analysis.data] == ["Mouse"]
+    assert analysis.load_report.counts["invalid_numeric"] == 1
+    assert analysis.append([SaleRecord("2024-01-03", "East", "Cable", 2 ** 64, 1.0)]) == 0
+    assert len(analysis.data) == 1
+
+
 # -------------------------------------------------------------------
 # 3. total revenue 
 # -------------------------------------------------------------------
@@ -197,3 +213,763 @@ def test_run_query(tmp_path):
     result = analysis.run_query(lambda rows: max(rows, key=lambda r: r.revenue))
     assert result.product == "Keyboard"
     assert result.revenue == 100
+
+
+# -------------------------------------------------------------------
+# 11. columnar storage: dictionary encoding + precomputed revenue
+# -------------------------------------------------------------------
+def test_columnar_storage(tmp_path):
+    rows = [
+        ["2024-01-01", "North", "Keyboard", "10", "10"],
+        ["2024-01-02", "North", "Mouse", "2", "20"],
+        ["2024-01-02", "South", "Keyboard", "1", "100"],
+    ]
+
+    csv_path = write_temp_csv(tmp_path, "columns.csv", rows)
+    analysis = SalesAnalysis(csv_path)
+    cols = analysis.columns
+
+    assert cols.regions.values == ["North", "South"]
+    assert list(cols.region_codes) == [0, 0, 1]
+    assert list(cols.product_codes) == [0, 1, 0]
+    assert list(cols.date_codes) == [0, 1, 1]
+    assert list(cols.revenue) == [100.0, 40.0, 100.0]
+
+
+# -------------------------------------------------------------------
+# 12. data view materializes SaleRecords on demand
+# -------------------------------------------------------------------
+def test_data_view_materializes_records(tmp_path):
+    rows = [
+        ["2024-01-01", "North", "Keyboard", "10", "10"],
+        ["2024-01-02", "South", "Mouse", "2", "20"],
+    ]
+
+    csv_path = write_temp_csv(tmp_path, "view.csv", rows)
+    analysis = SalesAnalysis(csv_path)
+
+    assert analysis.data[-1] == SaleRecord("2024-01-02", "South", "Mouse", 2, 20.0)
+    assert analysis.data[0:1] == [SaleRecord("2024-01-01", "North", "Keyboard", 10, 10.0)]
+    assert [r.revenue for r in analysis.data] == [100.0, 40.0]
+
+    with pytest.raises(IndexError):
+        analysis.data[2]
+
+
+# -------------------------------------------------------------------
+# 13. streaming mode matches the eager loader exactly
+# -------------------------------------------------------------------
+def test_stream_matches_eager(tmp_path):
+    rows = [
+        ["2024-01-10", "North", "Keyboard", "10", "10.10"],
+        ["2024-01-20", "South", "Mouse", "5", "20.20"],
+        ["2024-01-21", "", "Mouse", "5", "20.20"],            # invalid: skipped in both modes
+        ["2024-02-15", "East", "Laptop", "1", "300.30"],
+        ["bad-date", "North", "Keyboard", "3", "9.99"],        # counted, but not in the trend
+        ["2024-03-01", "North", "Mouse", "7", "12.50"],
+    ]
+
+    csv_path = write_temp_csv(tmp_path, "stream.csv", rows)
+    eager = SalesAnalysis(csv_path)
+
+    snapshots = [agg.row_count for agg in SalesAnalysis.stream(csv_path, chunk_size=2)]
+    assert snapshots == [2, 4, 5]
+
+    *_, agg = SalesAnalysis.stream(csv_path, chunk_size=2)
+    assert agg.total_revenue() == eager.total_revenue()
+    assert agg.revenue_by_region() == eager.revenue_by_region()
+    assert agg.units_sold_by_product() == eager.units_sold_by_product()
+    assert agg.avg_unit_price_by_product() == eager.avg_unit_price_by_product()
+    assert agg.sales_trend() == eager.sales_trend()
+
+
+def test_stream_empty_file_and_bad_chunk_size(tmp_path):
+    csv_path = write_temp_csv(tmp_path, "empty.csv", [])
+
+    results = list(SalesAnalysis.stream(csv_path))
+    assert len(results) == 1
+    assert results[0].total_revenue() == 0.0
+
+    with pytest.raises(ValueError):
+        next(SalesAnalysis.stream(csv_path, chunk_size=0))
+
+
+# -------------------------------------------------------------------
+# 14. parallel loader: same rows and same warning line numbers
+# -------------------------------------------------------------------
+def test_parallel_loader_matches_serial(tmp_path, caplog):
+    rows = []
+    for i in range(200):
+        rows.append([f"2024-{i % 12 + 1:02d}-01", "North" if i % 3 else "South", f"P{i % 7}", str(i % 9), "10.5"])
+        if i % 25 == 0:
+            rows.append(["2024-01-01", "North", "Mouse", "abc", "1"])    # invalid units
+        if i % 40 == 0:
+            rows.append(["2024-01-01", "", "Mouse", "1", "1"])          # missing region
+
+    csv_path = write_temp_csv(tmp_path, "parallel.csv", rows)
+
+    with caplog.at_level("WARNING"):
+        serial = SalesAnalysis(csv_path)
+    serial_warnings = [r.getMessage() for r in caplog.records]
+    caplog.clear()
+
+    with caplog.at_level("WARNING"):
+        parallel = SalesAnalysis(csv_path, workers=3)
+    parallel_warnings = [r.getMessage() for r in caplog.records]
+
+    assert parallel_warnings == serial_warnings
+    assert list(parallel.data) == list(serial.data)
+    assert parallel.revenue_by_region() == serial.revenue_by_region()
+    assert parallel.sales_trend() == serial.sales_trend()
+
+
+# -------------------------------------------------------------------
+# 15. fused aggregation: one pass, same answers as the single methods
+# -------------------------------------------------------------------
+def test_aggregate_matches_individual_methods(tmp_path):
+    rows = [
+        ["2024-01-10", "North", "Keyboard", "10", "10.10"],
+        ["2024-01-20", "South", "Mouse", "5", "20.20"],
+        ["2024-02-15", "East", "Laptop", "1", "300.30"],
+        ["2024-02-16", "North", "Mouse", "7", "19.90"],
+    ]
+
+    csv_path = write_temp_csv(tmp_path, "aggregate.csv", rows)
+    analysis = SalesAnalysis(csv_path)
+
+    report = analysis.aggregate(SalesAnalysis.BUILTIN_METRICS)
+
+    assert list(report) == list(SalesAnalysis.BUILTIN_METRICS)
+    for name in SalesAnalysis.BUILTIN_METRICS:
+        assert report[name] == getattr(analysis, name)()
+
+
+def test_ranged_aggregate_matches_methods(tmp_path):
+    rows = [[f"2024-{i % 6 + 1:02d}-10", f"R{i % 3}", f"P{i % 4}", str(i % 5), "2.5"] for i in range(60)]
+    analysis = SalesAnalysis(write_temp_csv(tmp_path, "ranged.csv", rows), cache_size=0)
+    start, end = "2024-02-01", "2024-04-30"
+
+    report = analysis.aggregate(SalesAnalysis.BUILTIN_METRICS, start=start, end=end)
+    for name in SalesAnalysis.BUILTIN_METRICS:
+        assert report[name] == getattr(analysis, name)(start=start, end=end)
+        assert analysis.aggregate([name], start=start, end=end) == {name: report[name]}
+
+    in_range = [r for r in rows if "2024-02" <= r[0][:7] <= "2024-04"]
+    assert report["total_revenue"] == sum(int(r[3]) * 2.5 for r in in_range) == 150.0
+    assert report["units_sold_by_product"] == {
+        p: sum(int(r[3]) for r in in_range if r[2] == p) for p in ("P0", "P1", "P2", "P3")
+    }
+    assert report["sales_trend"] == {(2024, 2): 50.0, (2024, 3): 50.0, (2024, 4): 50.0}
+
+
+def test_aggregate_with_registered_reducer(tmp_path):
+    rows = [
+        ["2024-01-10", "North", "Keyboard", "10", "10"],
+        ["2024-01-20", "South", "Mouse", "5", "20"],
+    ]
+
+    csv_path = write_temp_csv(tmp_path, "custom.csv", rows)
+    analysis = SalesAnalysis(csv_path)
+
+    analysis.register_reducer("max_revenue", lambda acc, r: max(acc, r.revenue), 0.0)
+    analysis.register_reducer("regions", lambda acc, r: acc | {r.region}, set(), sorted)
+
+    report = analysis.aggregate(["regions", "total_revenue", "max_revenue"])
+    assert report == {"regions": ["North", "South"], "total_revenue": 200.0, "max_revenue": 100.0}
+
+    with pytest.raises(ValueError):
+        analysis.aggregate(["no_such_metric"])
+
+    with pytest.raises(ValueError):
+        analysis.register_reducer("total_revenue", lambda acc, r: acc, 0)
+
+
+# -------------------------------------------------------------------
+# 16. query cache: hits, LRU eviction, invalidation on data change
+# -------------------------------------------------------------------
+def test_query_cache_hits_and_invalidation(tmp_path):
+    rows = [
+        ["2024-01-01", "North", "Keyboard", "10", "10"],   # 100
+        ["2024-01-02", "South", "Mouse", "1", "10"],       # 10
+    ]
+
+    csv_path = write_temp_csv(tmp_path, "cache.csv", rows)
+    analysis = SalesAnalysis(csv_path)
+
+    first = analysis.revenue_by_region()
+    first["North"] = -1                                    # caller mutation must not leak into the cache
+    assert analysis.revenue_by_region() == {"North": 100.0, "South": 10.0}
+    assert len(analysis.filter_sales_by_revenue(50)) == 1
+    assert len(analysis.filter_sales_by_revenue(50)) == 1
+
+    info = analysis.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 2, 2)
+    # Record queries keep row ids in the cache, never SaleRecord objects
+    assert [list(v) for v in analysis.cache.entries.values() if not isinstance(v, dict)] == [[0]]
+    assert analysis.filter_sales_by_revenue(50) is not analysis.filter_sales_by_revenue(50)
+
+    analysis.columns.append("2024-01-03", "North", "Laptop", 1, 500.0)
+    assert analysis.revenue_by_region() == {"North": 600.0, "South": 10.0}
+    assert analysis.cache_info().currsize == 1
+
+
+def test_query_cache_lru_eviction_and_disabled(tmp_path):
+    rows = [["2024-01-01", "North", "Keyboard", "10", "10"]]
+    csv_path = write_temp_csv(tmp_path, "lru.csv", rows)
+
+    analysis = SalesAnalysis(csv_path, cache_size=2)
+    for threshold in (1, 2, 3):
+        analysis.filter_sales_by_revenue(threshold)
+    analysis.filter_sales_by_revenue(1)                    # evicted → miss
+
+    info = analysis.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.currsize) == (0, 4, 2, 2)
+
+    uncached = SalesAnalysis(csv_path, cache_size=0)
+    assert uncached.cache_info() is None
+    assert uncached.total_revenue() == 100.0
+
+
+# -------------------------------------------------------------------
+# 17. incremental appends keep every aggregate up to date
+# -------------------------------------------------------------------
+def test_append_matches_full_reload(tmp_path):
+    first = [
+        ["2024-01-10", "North", "Keyboard", "10", "10.10"],
+        ["2024-01-20", "South", "Mouse", "5", "20.20"],
+    ]
+    second = [
+        ["2024-02-15", "East", "Laptop", "1", "300.30"],
+        ["2024-02-16", "North", "Mouse", "-2", "19.90"],      # negative units: rejected
+        ["2024-03-01", "North", "Mouse", "7", "12.50"],
+    ]
+
+    analysis = SalesAnalysis(write_temp_csv(tmp_path, "first.csv", first))
+    assert analysis.total_revenue() == pytest.approx(202.0)
+
+    accepted = analysis.append_csv(write_temp_csv(tmp_path, "second.csv", second))
+    assert accepted == 2
+
+    accepted = analysis.append([
+        SaleRecord("2024-03-02", "West", "Keyboard", 3, 11.0),
+        {"date": "2024-03-03", "region": "", "product": "Mouse", "units_sold": "1", "unit_price": "5"},
+        {"date": "2024-03-04", "region": "South", "product": "Laptop", "units_sold": 2, "unit_price": 750.0},
+    ])
+    assert accepted == 2
+
+    full = SalesAnalysis(write_temp_csv(tmp_path, "full.csv", first + second + [
+        ["2024-03-02", "West", "Keyboard", "3", "11.0"],
+        ["2024-03-04", "South", "Laptop", "2", "750.0"],
+    ]))
+
+    assert len(analysis.data) == len(full.data) == 6
+    for name in SalesAnalysis.BUILTIN_METRICS:
+        assert getattr(analysis, name)() == getattr(full, name)()
+
+
+def test_aggregates_only_fold_new_rows(tmp_path):
+    rows = [["2024-01-10", "North", "Keyboard", "10", "10"]]
+    analysis = SalesAnalysis(write_temp_csv(tmp_path, "inc.csv", rows))
+
+    aggregates = analysis.aggregates
+    assert aggregates.row_count == 1
+
+    analysis.append([SaleRecord("2024-01-11", "North", "Mouse", 1, 5.0)])
+    assert analysis.aggregates is aggregates
+    assert aggregates.row_count == 2
+    assert analysis.revenue_by_region() == {"North": 105.0}
+
+
+# -------------------------------------------------------------------
+# 18. revenue index: threshold filter, top/bottom-K, revenue ranges
+# -------------------------------------------------------------------
+def test_revenue_index_queries(tmp_path):
+    rows = [
+        ["2024-01-01", "North", "Keyboard", "10", "10"],   # 100
+        ["2024-01-02", "South", "Mouse", "1", "10"],       # 10
+        ["2024-01-03", "East", "Laptop", "1", "900"],      # 900
+        ["2024-01-04", "West", "Monitor", "5", "20"],      # 100 (ties with row 0)
+        ["2024-01-05", "North", "Mouse", "2", "25"],       # 50
+    ]
+
+    csv_path = write_temp_csv(tmp_path, "index.csv", rows)
+    indexed = SalesAnalysis(csv_path, revenue_index=True)
+    plain = SalesAnalysis(csv_path)
+
+    for threshold in (0, 10, 50, 100, 101, 1000):
+        assert indexed.filter_sales_by_revenue(threshold) == plain.filter_sales_by_revenue(threshold)
+
+    assert [r.revenue for r in indexed.top_k_by_revenue(3)] == [900, 100, 100]
+    assert [r.region for r in indexed.top_k_by_revenue(2)] == ["East", "North"]
+    assert [r.revenue for r in indexed.bottom_k_by_revenue(2)] == [10, 50]
+    assert [r.date for r in indexed.sales_in_revenue_range(50, 100)] == ["2024-01-01", "2024-01-04", "2024-01-05"]
+    assert indexed.top_k_by_revenue(0) == []
+
+
+def test_revenue_index_follows_appends(tmp_path):
+    rows = [["2024-01-01", "North", "Keyboard", "10", "10"]]
+    analysis = SalesAnalysis(write_temp_csv(tmp_path, "index_append.csv", rows), revenue_index=True)
+
+    assert analysis.top_k_by_revenue(1)[0].revenue == 100
+    analysis.append([SaleRecord("2024-01-02", "South", "Laptop", 1, 700.0)])
+
+    assert analysis.top_k_by_revenue(1)[0].product == "Laptop"
+    assert [r.product for r in analysis.filter_sales_by_revenue(50)] == ["Keyboard", "Laptop"]
+
+
+def test_revenue_index_merges_large_batches():
+    columns = SalesColumns()
+    columns.extend_rows([("2024-01-01", "North", "P", i % 7, 1.5) for i in range(200)])
+    index = RevenueIndex(columns)
+
+    # Bigger than INSERT_LIMIT → sorted and merged; ties must stay in row order
+    columns.extend_rows([("2024-01-02", "South", "P", (i * 3) % 7, 1.5) for i in range(100)])
+    index.refresh()
+    rebuilt = RevenueIndex(columns)
+    assert index.rows == rebuilt.rows and index.revenue == rebuilt.revenue
+
+
+# -------------------------------------------------------------------
+# 19. date-range filters on every aggregate
+# -------------------------------------------------------------------
+def test_date_range_filters(tmp_path):
+    rows = [
+        ["2024-01-10", "North", "Keyboard", "10", "10"],   # 100
+        ["2024-01-31", "South", "Mouse", "5", "20"],       # 100
+        ["2024-02-15", "East", "Laptop", "1", "300"],      # 300
+        ["2024-03-01", "North", "Mouse", "2", "25"],       # 50
+        ["not-a-date", "North", "Mouse", "1", "1"],        # never inside a range
+    ]
+
+    analysis = SalesAnalysis(write_temp_csv(tmp_path, "range.csv", rows))
+
+    assert analysis.total_revenue(start="2024-01-31", end="2024-02-15") == 400.0
+    assert analysis.revenue_by_region(start="2024-02-01") == {"East": 300.0, "North": 50.0}
+    assert analysis.units_sold_by_product(end="2024-01-31") == {"Keyboard": 10, "Mouse": 5}
+    assert analysis.avg_unit_price_by_product(start="2024-01-01", end="2024-12-31")["Mouse"] == pytest.approx(22.5)
+    assert analysis.sales_trend(start=datetime.date(2024, 1, 15)) == {(2024, 1): 100.0, (2024, 2): 300.0, (2024, 3): 50.0}
+    assert [r.date for r in analysis.filter_sales_by_revenue(100, end="2024-02-28")] == ["2024-01-10", "2024-01-31", "2024-02-15"]
+    assert analysis.aggregate(["total_revenue"], start="2024-03-01") == {"total_revenue": 50.0}
+
+    # Unbounded queries still see every row
+    assert analysis.total_revenue() == 551.0
+
+    with pytest.raises(ValueError):
+        analysis.total_revenue(start="yesterday")
+
+
+def test_date_index_partitions_by_month(tmp_path):
+    rows = [
+        ["2024-02-01", "North", "Keyboard", "1", "10"],
+        ["2023-12-31", "North", "Keyboard", "1", "10"],
+        ["2024-02-20", "North", "Keyboard", "1", "10"],
+    ]
+
+    analysis = SalesAnalysis(write_temp_csv(tmp_path, "partitions.csv", rows))
+    index = analysis.build_date_index()
+
+    assert index.months == [202312, 202402]
+    assert list(index.partitions[202402]) == [0, 2]
+    assert index.rows_between(20231201, 20240201) == [0, 1]
+
+    analysis.append([SaleRecord("2024-01-05", "South", "Mouse", 1, 1.0)])
+    assert analysis.build_date_index().months == [202312, 202401, 202402]
+
+
+# -------------------------------------------------------------------
+# 20. binary snapshots: round trip + transparent, validated reuse
+# -------------------------------------------------------------------
+def test_snapshot_round_trip(tmp_path):
+    rows = [
+        ["2024-01-10", "North", "Keyboard", "10", "10.10"],
+        ["2024-02-15", "Süd", "Mouse", "5", "20.20"],
+        ["bad-date", "East", "Laptop", "1", "300.30"],
+    ]
+
+    csv_path = write_temp_csv(tmp_path, "snap.csv", rows)
+    analysis = SalesAnalysis(csv_path)
+    snapshot_path = analysis.save_snapshot(str(tmp_path / "snap.bin"))
+
+    loaded = SalesAnalysis.load_snapshot(snapshot_path)
+
+    assert loaded.csv_path == csv_path
+    assert list(loaded.data) == list(analysis.data)
+    for name in SalesAnalysis.BUILTIN_METRICS:
+        assert getattr(loaded, name)() == getattr(analysis, name)()
+    assert loaded.total_revenue(start="2024-02-01") == analysis.total_revenue(start="2024-02-01")
+
+
+def test_constructor_uses_valid_snapshot_only(tmp_path, monkeypatch):
+    rows = [["2024-01-10", "North", "Keyboard", "10", "10"]]
+    csv_path = write_temp_csv(tmp_path, "auto.csv", rows)
+    SalesAnalysis(csv_path).save_snapshot()
+    assert os.path.exists(csv_path + ".snapshot")
+
+    def no_parsing(self):
+        raise AssertionError("CSV should not be parsed")
+
+    monkeypatch.setattr(SalesAnalysis, "_load_csv", no_parsing)
+    assert SalesAnalysis(csv_path).total_revenue() == 100.0
+
+    # Same bytes, new mtime → hash check still accepts the snapshot
+    os.utime(csv_path, ns=(0, 0))
+    assert SalesAnalysis(csv_path).total_revenue() == 100.0
+
+    # Changed contents → snapshot is stale and the CSV is parsed again
+    monkeypatch.undo()
+    write_temp_csv(tmp_path, "auto.csv", rows + [["2024-01-11", "South", "Mouse", "1", "5"]])
+    assert SalesAnalysis(csv_path).total_revenue() == 105.0
+
+
+def test_constructor_rejects_appended_stale_or_broken_snapshots(tmp_path, caplog):
+    rows = [["2024-01-10", "North", "Keyboard", "1", "10"]]
+    csv_path = write_temp_csv(tmp_path, "auto.csv", rows)
+
+    # Appended rows are not in the CSV → only load_snapshot may open that file
+    analysis = SalesAnalysis(csv_path)
+    analysis.append([SaleRecord("2024-01-11", "South", "Mouse", 5, 5.0)])
+    analysis.save_snapshot()
+    reopened = SalesAnalysis(csv_path)
+    assert (len(reopened.data), reopened.total_revenue()) == (1, 10.0)
+    assert len(SalesAnalysis.load_snapshot(csv_path + ".snapshot").data) == 2
+
+    # Same size and same mtime, different bytes → the hash catches it
+    SalesAnalysis(csv_path).save_snapshot()
+    st = os.stat(csv_path)
+    write_temp_csv(tmp_path, "auto.csv", [["2024-01-10", "North", "Keyboard", "2", "10"]])
+    os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert SalesAnalysis(csv_path).total_revenue() == 20.0
+
+    # Truncated or malformed snapshots are ignored with a warning
+    for content in (b"SALES", b"SALESNAP\x01\x00\x00\x00\x04\x00\x00\x00[12]", b""):
+        with open(csv_path + ".snapshot", "wb") as f:
+            f.write(content)
+        with caplog.at_level("WARNING"):
+            assert SalesAnalysis(csv_path).total_revenue() == 20.0
+    assert sum("Ignoring unreadable snapshot" in r.getMessage() for r in caplog.records) == 3
+
+
+# -------------------------------------------------------------------
+# 21. fast-path parser: same rows and rejections as the DictReader path
+# -------------------------------------------------------------------
+@pytest.mark.parametrize("header", [
+    ["date", "region", "product", "units_sold", "unit_price"],
+    ["unit_price", "date", "region", "product", "units_sold", "region"],   # reordered, duplicate
+    ["date", "region", "product", "units_sold"],                          # missing a column
+])
+def test_fast_parser_matches_dict_reader(tmp_path, header):
+    lines = [
+        ",".join(header),
+        "2024-01-01,North,Keyboard,10,25.50,",
+        "2024-01-02,South,Mouse,20",                # short row
+        "",                                         # blank line, not counted
+        "2024-01-03,East,Monitor,1,5,extra,more",   # extra fields
+        ", , ,  ,",                                 # blank values
+        ", , , , , , ",                             # blank values plus extras
+        "2024-01-04, ,Laptop,1,1",
+        "2024-01-05,West,   ,1,1",
+        "2024-01-06,West,Cable,-1,1",
+        "2024-01-07,West,Cable,1,0",
+        "2024-01-08,West,Cable,x,1",
+    ]
+    csv_path = tmp_path / "fast.csv"
+    csv_path.write_text("\n".join(lines) + "\n")
+
+    def run(validate):
+        rejected = []
+        with open(csv_path) as f:
+            rows = list(validate(f, lambda rule, idx, row, error, fieldnames=None: rejected.append(
+                (rule, idx, row if fieldnames is None else _row_dict(fieldnames, row), repr(error))
+            )))
+        return rows, rejected
+
+    def fast(f, on_invalid):
+        reader = csv.reader(f)
+        return SalesAnalysis._validate_fields(reader, next(reader), 2, on_invalid)
+
+    def slow(f, on_invalid):
+        return SalesAnalysis._validate_rows(csv.DictReader(f), 2, on_invalid)
+
+    assert run(fast) == run(slow)
+
+
+def test_extend_rows_matches_append():
+    rows = [
+        ("2024-01-01", "North", "Keyboard", 10, 25.5),
+        ("2024-01-01", "South", "Mouse", 2, 4.0),
+        ("bad-date", "North", "Laptop", 1, 999.99),
+        ("2024-02-01", "East", "Mouse", 0, 1.25),
+    ]
+    one_by_one, bulk = SalesColumns(), SalesColumns()
+    for row in rows:
+        one_by_one.append(*row)
+    bulk.extend_rows(rows[:1])
+    bulk.extend_rows(rows[1:])
+    bulk.extend_rows([])
+
+    assert list(bulk.rows()) == list(one_by_one.rows())
+    assert bulk.revenue == one_by_one.revenue
+    assert bulk.date_codes == one_by_one.date_codes
+    assert bulk.product_codes == one_by_one.product_codes
+    assert bulk.month_of_date == one_by_one.month_of_date
+    assert bulk.months == one_by_one.months
+
+
+# -------------------------------------------------------------------
+# 22. load report: per-rule counters, sampled lines, capped warnings
+# -------------------------------------------------------------------
+def test_load_report_counts_and_samples(tmp_path, caplog):
+    rows = [["2024-01-01", "North", "Keyboard", "10", "25.50"]]
+    rows += [["2024-01-02", "North", "Mouse", "abc", "1"]] * 30    # invalid units
+    rows += [["2024-01-03", "", "Mouse", "1", "1"]] * 2             # missing region
+    rows += [["2024-01-04", "East", "Monitor", "-3", "1"]]         # negative units
+
+    csv_path = write_temp_csv(tmp_path, "report.csv", rows)
+    with caplog.at_level("WARNING"):
+        analysis = SalesAnalysis(csv_path, log_limit=5)
+
+    report = analysis.load_report
+    assert report.rows_read == 34 and report.rows_loaded == 1 and report.rows_rejected == 33
+    assert report.counts["invalid_numeric"] == 30
+    assert report.counts["missing_region"] == 2
+    assert report.counts["negative_units"] == 1
+    assert report.counts["invalid_price"] == 0
+    assert report.samples["invalid_numeric"] == list(range(3, 13))
+    assert report.samples["missing_region"] == [33, 34]
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert sum("Invalid numeric value" in m for m in messages) == 5
+    assert messages[-1] == "Suppressed 25 further invalid-row warnings (invalid_numeric=25)"
+
+
+def test_load_report_survives_snapshots_and_workers(tmp_path):
+    rows = [["2024-01-01", "North", "Keyboard", str(i % 5), "2"] for i in range(100)]
+    rows += [["2024-01-02", "North", "Mouse", "1", "0"]] * 3        # invalid price
+
+    csv_path = write_temp_csv(tmp_path, "report.csv", rows)
+    serial = SalesAnalysis(csv_path, snapshot_path=str(tmp_path / "none"))
+    parallel = SalesAnalysis(csv_path, workers=3, snapshot_path=str(tmp_path / "none"))
+    assert parallel.load_report.as_dict() == serial.load_report.as_dict()
+
+    serial.save_snapshot(csv_path + ".snapshot")
+    assert SalesAnalysis(csv_path).load_report.as_dict() == serial.load_report.as_dict()
+    assert SalesAnalysis.load_snapshot(csv_path + ".snapshot").load_report.counts["invalid_price"] == 3
+
+
+def test_rejected_rows_stay_raw_until_logged(tmp_path, caplog):
+    rows = [["2024-01-01", "North", "Keyboard", "10", "2"]] + [["2024-01-02", "", "Mouse", "1", "1"]] * 4
+    csv_path = write_temp_csv(tmp_path, "raw.csv", rows)
+
+    seen = []
+    list(SalesAnalysis._iter_rows(csv_path, lambda *args: seen.append(args)))
+    assert seen[0] == ("missing_region", 3, ["2024-01-02", "", "Mouse", "1", "1"], None,
+                       ["date", "region", "product", "units_sold", "unit_price"])
+
+    # Workers only send back the fields of rows that may still be logged
+    size = os.path.getsize(csv_path)
+    header = ["date", "region", "product", "units_sold", "unit_price"]
+    with open(csv_path, "rb") as f:
+        start = len(f.readline())
+    _, row_count, rejected = _parse_byte_range(csv_path, start, size, header, 1)
+    assert row_count == 5
+    assert [row is not None for _, _, row, _, _ in rejected] == [True, False, False, False]
+
+    with caplog.at_level("WARNING"):
+        parallel = SalesAnalysis(csv_path, workers=2, log_limit=1, snapshot_path=str(tmp_path / "none"))
+    messages = [r.getMessage() for r in caplog.records]
+    assert messages == [
+        "Skipping row (missing region) at line 3: "
+        "{'date': '2024-01-02', 'region': '', 'product': 'Mouse', 'units_sold': '1', 'unit_price': '1'}",
+        "Suppressed 3 further invalid-row warnings (missing_region=3)",
+    ]
+    assert parallel.load_report.counts["missing_region"] == 4
+
+
+# -------------------------------------------------------------------
+# 23. group_by engine: multi-key groups, every aggregator, date ranges
+# -------------------------------------------------------------------
+def test_group_by_multi_key_metrics(tmp_path):
+    rows = [
+        ["2024-01-10", "North", "Keyboard", "10", "2.0"],
+        ["2024-01-20", "North", "Keyboard", "4", "3.0"],
+        ["2024-02-01", "North", "Mouse", "1", "5.0"],
+        ["2024-01-15", "South", "Keyboard", "2", "1.0"],
+        ["bad-date", "North", "Keyboard", "7", "1.0"],
+    ]
+    analysis = SalesAnalysis(write_temp_csv(tmp_path, "group.csv", rows))
+
+    cube = analysis.group_by(
+        ["region", "month"],
+        {"revenue": "sum", "unit_price": ["mean", "min", "max"], "units_sold": "count", "product": "distinct"},
+    )
+    assert list(cube) == [("North", (2024, 1)), ("North", (2024, 2)), ("South", (2024, 1))]
+    assert cube["North", (2024, 1)] == {
+        "revenue": 32.0, "unit_price_mean": 2.5, "unit_price_min": 2.0, "unit_price_max": 3.0,
+        "units_sold": 2, "product": 1,
+    }
+
+    by_product = analysis.group_by(["product"], {"units_sold": "sum", "month": "distinct", "date": "distinct"})
+    assert by_product["Keyboard"] == {"units_sold": 23, "month": 1, "date": 4}
+
+    assert analysis.group_by([], {"revenue": "count"}) == {(): {"revenue": 5}}
+    assert analysis.group_by(["year"], {"revenue": "sum"}) == {2024: {"revenue": 39.0}}
+    assert analysis.group_by(["region"], {"revenue": "sum"}, start="2024-01-15", end="2024-01-31") == {
+        "North": {"revenue": 12.0},
+        "South": {"revenue": 2.0},
+    }
+
+    with pytest.raises(ValueError):
+        analysis.group_by(["colour"], {"revenue": "sum"})
+    with pytest.raises(ValueError):
+        analysis.group_by(["region"], {"region": "sum"})
+    with pytest.raises(ValueError):
+        analysis.group_by(["region"], {})
+
+
+def test_builtin_methods_match_group_by(tmp_path):
+    rows = [[f"2024-{i % 12 + 1:02d}-{i % 27 + 1:02d}", f"R{i % 4}", f"P{i % 7}", str(i % 9), f"{1 + i % 5}.25"] for i in range(300)]
+    analysis = SalesAnalysis(write_temp_csv(tmp_path, "builtin.csv", rows))
+
+    for start, end in ((None, None), ("2024-03-05", "2024-08-20")):
+        assert analysis.revenue_by_region(start, end) == {
+            k: v["revenue"] for k, v in analysis.group_by(["region"], {"revenue": "sum"}, start, end).items()
+        }
+        assert analysis.sales_trend(start, end) == {
+            k: v["revenue"] for k, v in analysis.group_by(["month"], {"revenue": "sum"}, start, end).items()
+        }
+        assert analysis.avg_unit_price_by_product(start, end) == {
+            k: v["unit_price"] for k, v in analysis.group_by(["product"], {"unit_price": "mean"}, start, end).items()
+        }
+    assert analysis.total_revenue(start="2030-01-01") == 0.0
+
+
+def test_ranged_month_group_reads_only_rows_in_range(tmp_path):
+    rows = [[f"2024-{i % 12 + 1:02d}-{i % 27 + 1:02d}", f"R{i % 4}", "P", "1", "2.0"] for i in range(240)]
+    analysis = SalesAnalysis(write_temp_csv(tmp_path, "ranged_month.csv", rows), cache_size=0)
+    expected = {key: analysis.group_by([key], {"revenue": "sum"}, "2024-03-01", "2024-03-31") for key in ("month", "year")}
+
+    class RowsOnly:
+        """Date codes that can be indexed per row but not scanned whole."""
+
+        def __init__(self, codes):
+            self.codes = codes
+
+        def __getitem__(self, i):
+            return self.codes[i]
+
+        def __len__(self):
+            return len(self.codes)
+
+        def __iter__(self):
+            raise AssertionError("ranged group_by scanned every date code")
+
+    analysis.columns.date_codes = RowsOnly(analysis.columns.date_codes)
+    for key in ("month", "year"):
+        assert analysis.group_by([key], {"revenue": "sum"}, "2024-03-01", "2024-03-31") == expected[key]
+    assert analysis.sales_trend(start="2024-03-01", end="2024-03-31") == {(2024, 3): 40.0}
+
+
+# -------------------------------------------------------------------
+# 24. rollup cube: coarser queries answered from (region, product, month) cells
+# -------------------------------------------------------------------
+def test_rollup_matches_row_scan(tmp_path):
+    rows = [[f"2024-{i % 12 + 1:02d}-01", f"R{i % 3}", f"P{i % 5}", str(i % 9), f"{1 + i % 4}.1"] for i in range(240)]
+    rows.append(["bad-date", "R9", "P0", "3", "2.5"])
+    csv_path = write_temp_csv(tmp_path, "rollup.csv", rows)
+
+    plain = SalesAnalysis(csv_path)
+    cubed = SalesAnalysis(csv_path, rollup=True)
+    assert len(cubed.build_rollup().cell_of) == 61                   # 60 dated cells + 1 month-less
+
+    # Built-in metrics stay on the maintained aggregates: exactly equal, not just close
+    *_, streamed = SalesAnalysis.stream(csv_path, chunk_size=50)
+    for name in SalesAnalysis.BUILTIN_METRICS:
+        expected = getattr(plain, name)()
+        assert getattr(cubed, name)() == expected == getattr(streamed, name)()
+        if isinstance(expected, dict):
+            assert list(getattr(cubed, name)()) == list(expected)
+    assert cubed.aggregate(SalesAnalysis.BUILTIN_METRICS) == plain.aggregate(SalesAnalysis.BUILTIN_METRICS)
+
+    spec = (["region", "year"], {"revenue": ["sum", "mean"], "units_sold": "count", "product": "distinct"})
+    expected = plain.group_by(*spec)
+    assert list(cubed.group_by(*spec)) == list(expected)
+    for group, values in cubed.group_by(*spec).items():
+        assert values == pytest.approx(expected[group])
+    assert "R9" not in cubed.group_by(*spec) and cubed.revenue_by_region()["R9"] == 7.5
+
+    # Not covered by the cube (min, dates) → falls back to the row scan
+    assert cubed.group_by(["region"], {"unit_price": "min"}) == plain.group_by(["region"], {"unit_price": "min"})
+
+
+def test_rollup_follows_appends(tmp_path):
+    csv_path = write_temp_csv(tmp_path, "rollup.csv", [["2024-01-01", "North", "Keyboard", "1", "10"]])
+    analysis = SalesAnalysis(csv_path, rollup=True)
+    assert analysis.sales_trend() == {(2024, 1): 10.0}
+
+    analysis.append([SaleRecord("2024-02-01", "North", "Keyboard", 2, 10.0)])
+    assert analysis.sales_trend() == {(2024, 1): 10.0, (2024, 2): 20.0}
+    assert analysis.group_by(["product"], {"units_sold": "sum"}) == {"Keyboard": {"units_sold": 3}}
+
+
+# -------------------------------------------------------------------
+# 25. lazy query builder: fused filters, index pushdown, terminals
+# -------------------------------------------------------------------
+def query_dataset(tmp_path):
+    rows = [
+        [f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", ("North", "South", "East")[i % 3], f"P{i % 4}", str(i % 11), f"{i % 97 + 1}.5"]
+        for i in range(600)
+    ]
+    return SalesAnalysis(write_temp_csv(tmp_path, "query.csv", rows))
+
+
+def test_query_matches_brute_force(tmp_path):
+    analysis = query_dataset(tmp_path)
+    records = list(analysis.data)
+
+    def expected(pred):
+        units = {}
+        for r in records:
+            if pred(r):
+                units[r.product] = units.get(r.product, 0) + r.units_sold
+        return units
+
+    base = analysis.query()
+    north = base.where(region="North").where_revenue_gte(500)
+    assert north.group_by("product").sum("units_sold") == expected(lambda r: r.region == "North" and r.revenue >= 500)
+    assert base.where(region="North").count() == 200                       # builders don't modify `base`
+    assert base.count() == 600
+
+    march = base.where_date_between("2024-03-01", "2024-03-31").where(product=["P1", "P2"])
+    assert march.group_by("product").sum("units_sold") == expected(
+        lambda r: r.date.startswith("2024-03") and r.product in ("P1", "P2")
+    )
+    assert list(march.records()) == [r for r in records if r.date.startswith("2024-03") and r.product in ("P1", "P2")]
+
+    ranged = base.where_revenue_between(100, 200)
+    assert ranged.sum("revenue") == sum(r.revenue for r in records if 100 <= r.revenue <= 200)
+    assert ranged.min("units_sold") == min(r.units_sold for r in records if 100 <= r.revenue <= 200)
+    assert base.where(region="Nowhere").sum("revenue") == 0
+    assert base.where(region="Nowhere").mean("unit_price") is None
+    assert base.group_by("region").agg({"revenue": "count"}) == analysis.group_by(["region"], {"revenue": "count"})
+
+
+def test_query_plan_uses_selective_indexes(tmp_path):
+    analysis = query_dataset(tmp_path)
+    base = analysis.query()
+
+    assert base.explain() == "scan"
+    assert base.where(region="North").where_revenue_gte(900).explain() == "scan(region) → filter(revenue)"
+
+    analysis.build_revenue_index()
+    top = base.where(region="North").where_revenue_gte(900).group_by("product")
+    assert top.explain() == "index(revenue) → filter(region) → group_by(product)"
+    # An index that keeps most rows is not worth re-sorting its ids
+    assert base.where_revenue_gte(1).explain() == "scan(revenue)"
+
+    one_day = base.where_revenue_gte(300).where_date_between("2024-05-05", "2024-05-05")
+    assert one_day.explain() == "index(date_range) → filter(revenue)"
+
+    with pytest.raises(ValueError):
+        base.where(units_sold=3)
+    with pytest.raises(ValueError):
+        base.group_by("colour")
@@ -0,0 +1,68 @@
+import logging
+
+import pytest
+
+from assignment2.sales_analysis import SalesAnalysis
+from assignment2.sales_pipeline import aggregate_csv
+from assignment2.test_sales_analysis import write_temp_csv
+
+
+ROWS = [
+    ["2024-01-01", "North", "Keyboard", "10", "25.50"],
+    ["2024-01-15", "South", "Mouse", "20", "15.00"],
+    ["", "", "", "", ""],
+    ["2024-02-01", "North", "Mouse", "abc", "15.00"],
+    ["2024-02-03", "East", "Keyboard", "3", "30.25"],
+    ["2024-03-09", "South", "Monitor", "1", "199.99"],
+] * 40
+
+
+# -------------------------------------------------------------------
+# 1. single aggregator matches SalesAnalysis exactly
+# -------------------------------------------------------------------
+def test_single_consumer_matches_sales_analysis(tmp_path):
+    csv_path = write_temp_csv(tmp_path, "sales.csv", ROWS)
+    logging.disable(logging.WARNING)
+    try:
+        expected = SalesAnalysis(csv_path)
+        streamed = aggregate_csv(csv_path, consumers=1, queue_size=2, chunk_size=7)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    assert streamed.row_count == len(expected.data) == 160
+    assert streamed.total_revenue() == expected.total_revenue()
+    assert streamed.revenue_by_region() == expected.revenue_by_region()
+    assert streamed.sales_trend() == expected.sales_trend()
+
+
+# -------------------------------------------------------------------
+# 2. concurrent aggregators merge to the same totals
+# -------------------------------------------------------------------
+def test_concurrent_consumers_merge_partials(tmp_path, caplog):
+    csv_path = write_temp_csv(tmp_path, "sales.csv", ROWS)
+    with caplog.at_level(logging.WARNING):
+        streamed = aggregate_csv(csv_path, consumers=3, queue_size=2, chunk_size=5)
+    warnings = len(caplog.records)
+    expected = SalesAnalysis(csv_path)
+
+    assert streamed.row_count == 160
+    assert streamed.units_sold_by_product() == expected.units_sold_by_product()
+    assert streamed.total_revenue() == pytest.approx(expected.total_revenue())
+    assert streamed.avg_unit_price_by_product() == pytest.approx(expected.avg_unit_price_by_product())
+    assert warnings == 80
+
+
+# -------------------------------------------------------------------
+# 3. reader errors are raised, not returned as short totals
+# -------------------------------------------------------------------
+def test_reader_errors_are_raised(tmp_path, monkeypatch):
+    with pytest.raises(FileNotFoundError):
+        aggregate_csv(str(tmp_path / "missing.csv"))
+
+    def failing_rows(csv_path):
+        yield ("2024-01-01", "North", "Keyboard", 1, 2.0)
+        raise OSError("read failed")
+
+    monkeypatch.setattr(SalesAnalysis, "_iter_rows", staticmethod(failing_rows))
+    with pytest.raises(OSError, match="read failed"):
+        aggregate_csv(str(tmp_path / "any.csv"), consumers=2, chunk_size=1)
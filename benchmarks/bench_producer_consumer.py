@@ -0,0 +1,197 @@
+import contextlib
+import io
+import statistics
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Tuple
+
+from assignment1.producer_consumer import QUEUE_IMPLS, SENTINEL, run_pipeline
+from benchmarks.timing import measure
+
+
+def queue_round(
+    max_size: int, items: int, producers: int, consumers: int, queue_impl: str = "blocking"
+) -> Tuple[float, List[int]]:
+    """
+    Push `items` timestamps through one queue (`queue_impl`, see QUEUE_IMPLS) with the given thread counts.
+
+    Returns the wall time and the per-item put → get latencies in nanoseconds.
+    """
+    queue = QUEUE_IMPLS[queue_impl](max_size=max_size)
+    latencies: List[List[int]] = [[] for _ in range(consumers)]
+    shares = [items // producers + (1 if i < items % producers else 0) for i in range(producers)]
+
+    def produce(count: int) -> None:
+        put, clock = queue.put, time.perf_counter_ns
+        for _ in range(count):
+            put(clock())
+
+    def consume(out: List[int]) -> None:
+        get, clock = queue.get, time.perf_counter_ns
+        while True:
+            item = get()
+            if item is SENTINEL:
+                return
+            out.append(clock() - item)
+
+    consumer_threads = [threading.Thread(target=consume, args=(out,)) for out in latencies]
+    producer_threads = [threading.Thread(target=produce, args=(share,)) for share in shares]
+
+    start = time.perf_counter()
+    for t in consumer_threads + producer_threads:
+        t.start()
+    for t in producer_threads:
+        t.join()
+    for _ in consumer_threads:
+        queue.put(SENTINEL)
+    for t in consumer_threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    return elapsed, [ns for out in latencies for ns in out]
+
+
+def bench_queue(
+    max_sizes: Iterable[int],
+    item_counts: Iterable[int],
+    thread_counts: Iterable[Tuple[int, int]],
+    repeats: int = 3,
+    queue_impls: Iterable[str] = ("blocking",),
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Queue throughput and put → get latency for each size / item count / thread mix.
+
+    Implementations other than "blocking" get an `impl=` key suffix; the
+    single-producer/consumer "ring" queue only runs for 1x1 thread mixes.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+
+    runs = [
+        (max_size, items, producers, consumers, impl)
+        for max_size in max_sizes
+        for items in item_counts
+        for producers, consumers in thread_counts
+        for impl in queue_impls
+        if impl != "ring" or (producers, consumers) == (1, 1)
+    ]
+
+    for max_size, items, producers, consumers, impl in runs:
+        rounds = [queue_round(max_size, items, producers, consumers, impl) for _ in range(repeats)]
+        elapsed, latencies = min(rounds, key=lambda r: r[0])
+        q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0] * 99
+
+        suffix = "" if impl == "blocking" else f",impl={impl}"
+        key = f"queue.throughput[max_size={max_size},items={items},threads={producers}x{consumers}{suffix}]"
+        results[key] = {
+            "seconds": elapsed,
+            "repeats": repeats,
+            "items_per_sec": items / elapsed if elapsed else 0.0,
+            "latency_p50_us": q[49] / 1000,
+            "latency_p99_us": q[98] / 1000,
+            "latency_max_us": max(latencies, default=0) / 1000,
+        }
+
+    return results
+
+
+def priority_round(
+    max_size: int, items: int, urgent_every: int, queue_impl: str, work: int = 2000
+) -> Tuple[float, List[int], List[int]]:
+    """
+    One producer feeds one consumer that does `work` units of CPU per item,
+    so a backlog builds (it has to outlast a GIL switch interval to matter).
+    Every `urgent_every`-th item is urgent (priority 0, the rest 1; only
+    "priority" honours that). Returns wall time and the urgent / bulk
+    put → get latencies in nanoseconds.
+    """
+    queue = QUEUE_IMPLS[queue_impl](max_size=max_size)
+    urgent: List[int] = []
+    bulk: List[int] = []
+
+    def produce() -> None:
+        clock = time.perf_counter_ns
+        prioritized = queue_impl == "priority"
+        for i in range(items):
+            is_urgent = i % urgent_every == 0
+            entry = (is_urgent, clock())
+            if prioritized:
+                queue.put(entry, priority=0 if is_urgent else 1)
+            else:
+                queue.put(entry)
+        queue.put(SENTINEL)
+
+    def consume() -> None:
+        get, clock = queue.get, time.perf_counter_ns
+        while True:
+            entry = get()
+            if entry is SENTINEL:
+                return
+            (urgent if entry[0] else bulk).append(clock() - entry[1])
+            sum(range(work))
+
+    threads = [threading.Thread(target=consume), threading.Thread(target=produce)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, urgent, bulk
+
+
+def bench_priority(
+    max_sizes: Iterable[int],
+    item_counts: Iterable[int],
+    urgent_every: int = 100,
+    repeats: int = 3,
+    queue_impls: Iterable[str] = ("blocking", "priority"),
+    work: int = 2000,
+) -> Dict[str, Dict[str, Any]]:
+    """Urgent vs bulk tail latency under a backlog, FIFO vs priority queue."""
+    results: Dict[str, Dict[str, Any]] = {}
+
+    for max_size in max_sizes:
+        for items in item_counts:
+            for impl in queue_impls:
+                rounds = [priority_round(max_size, items, urgent_every, impl, work) for _ in range(repeats)]
+                elapsed, urgent, bulk = min(rounds, key=lambda r: r[0])
+                urgent_q = statistics.quantiles(urgent, n=100) if len(urgent) > 1 else [0] * 99
+                bulk_q = statistics.quantiles(bulk, n=100) if len(bulk) > 1 else [0] * 99
+
+                results[f"queue.priority[max_size={max_size},items={items},impl={impl}]"] = {
+                    "seconds": elapsed,
+                    "repeats": repeats,
+                    "items_per_sec": items / elapsed if elapsed else 0.0,
+                    "urgent_p99_us": urgent_q[98] / 1000,
+                    "urgent_max_us": max(urgent, default=0) / 1000,
+                    "bulk_p99_us": bulk_q[98] / 1000,
+                }
+
+    return results
+
+
+def bench_pipeline(
+    item_counts: Iterable[int],
+    queue_size: int = 10,
+    batch_sizes: Iterable[int] = (1,),
+    repeats: int = 3,
+    queue_impls: Iterable[str] = ("blocking",),
+) -> Dict[str, Dict[str, Any]]:
+    """End-to-end `run_pipeline` time per item count, batch size and queue_impl (its console output is discarded)."""
+    results: Dict[str, Dict[str, Any]] = {}
+
+    for items in item_counts:
+        source = list(range(items))
+
+        for batch_size in batch_sizes:
+            for impl in queue_impls:
+                def run():
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        run_pipeline(source, queue_size=queue_size, batch_size=batch_size, queue_impl=impl)
+
+                result = measure(run, repeats, min_time=0)
+                result["items_per_sec"] = items / result["seconds"] if result["seconds"] else 0.0
+                suffix = "" if impl == "blocking" else f",impl={impl}"
+                key = f"pipeline.run_pipeline[items={items},queue_size={queue_size},batch_size={batch_size}{suffix}]"
+                results[key] = result
+
+    return results
@@ -0,0 +1,64 @@
+import logging
+import os
+from typing import Dict, Any, Iterable
+
+from assignment2.sales_analysis import RollupCube, SalesAnalysis, SalesAggregates
+from benchmarks.datagen import generate_sales_csv
+from benchmarks.timing import measure
+
+
+def sales_dataset(data_dir: str, rows: int) -> str:
+    """Path of a generated CSV with `rows` rows, created on first use and reused afterwards."""
+    path = os.path.join(data_dir, f"sales_{rows}.csv")
+    if not os.path.exists(path):
+        generate_sales_csv(path, rows)
+    return path
+
+
+def bench_sales(data_dir: str, sizes: Iterable[int], repeats: int = 3) -> Dict[str, Dict[str, Any]]:
+    """Time CSV loading and every `SalesAnalysis` query at each dataset size."""
+    results: Dict[str, Dict[str, Any]] = {}
+
+    # The generated files contain bad rows on purpose; keep their warnings out of the timings
+    previous = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    try:
+        for rows in sizes:
+            path = sales_dataset(data_dir, rows)
+            tag = f"[rows={rows}]"
+
+            # Point at a snapshot that never exists → the CSV is parsed; cache off → queries really run
+            analysis = SalesAnalysis(path, cache_size=0, snapshot_path=path + ".no-snapshot")
+            columns = analysis.columns
+
+            results[f"sales.load_csv{tag}"] = measure(analysis._load_csv, repeats)
+            results[f"sales.build_aggregates{tag}"] = measure(lambda: SalesAggregates().update(columns.rows()), repeats)
+
+            analysis.aggregates
+            analysis.build_revenue_index()
+            analysis.build_date_index()
+
+            queries = {
+                "total_revenue": analysis.total_revenue,
+                "revenue_by_region": analysis.revenue_by_region,
+                "units_sold_by_product": analysis.units_sold_by_product,
+                "avg_unit_price_by_product": analysis.avg_unit_price_by_product,
+                "sales_trend": analysis.sales_trend,
+                "aggregate_all": lambda: analysis.aggregate(SalesAnalysis.BUILTIN_METRICS),
+                "filter_sales_by_revenue": lambda: analysis.filter_sales_by_revenue(5000),
+                "top_k_by_revenue": lambda: analysis.top_k_by_revenue(10),
+                "revenue_by_region_90_days": lambda: analysis.revenue_by_region(start="2024-10-03", end="2024-12-31"),
+            }
+            for name, query in queries.items():
+                results[f"sales.{name}{tag}"] = measure(query, repeats)
+
+            # Region x product x month slices: one row scan vs the rollup cube's cells
+            cube_query = lambda: analysis.group_by(["region", "product", "month"], {"revenue": "sum", "units_sold": "sum"})
+            results[f"sales.group_by_cube_scan{tag}"] = measure(cube_query, repeats)
+            results[f"sales.build_rollup{tag}"] = measure(lambda: RollupCube(columns), repeats)
+            analysis.build_rollup()
+            results[f"sales.group_by_cube_rollup{tag}"] = measure(cube_query, repeats)
+    finally:
+        logging.disable(previous)
+
+    return results
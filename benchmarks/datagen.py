@@ -0,0 +1,72 @@
+import csv
+import datetime
+import random
+from typing import Optional
+
+# ---------------------------------------------------------
+# Synthetic sales data with the same schema as data/sales_large.csv
+# ---------------------------------------------------------
+REGIONS = ["North", "South", "East", "West"]
+PRODUCTS = {
+    "Keyboard": (20.0, 250.0),
+    "Mouse": (10.0, 80.0),
+    "Laptop": (600.0, 900.0),
+    "Monitor": (100.0, 450.0),
+    "Headset": (30.0, 600.0),
+    "Camera": (70.0, 800.0),
+}
+FIRST_DAY = datetime.date(2023, 1, 1)
+DAYS = 731  # 2023-01-01 .. 2024-12-31
+
+# The kinds of bad rows the real exports contain, all rejected by the loader
+DIRTY_ROWS = [
+    ["2024-01-18", "", "Keyboard", "10", "25.50"],
+    ["2024-01-18", "North", "Mouse", "abc", "15.00"],
+    ["2024-01-19", "South", "", "12", "25.50"],
+    ["2024-01-19", "East", "Monitor", "-3", "120.00"],
+    ["2024-01-20", "West", "Keyboard", "10", ""],
+    ["hello", "this", "is", "not", "valid"],
+    ["2024-01-21", "North", "Keyboard", "10"],
+]
+
+
+def generate_sales_csv(path: str, rows: int, dirty_ratio: float = 0.02, seed: Optional[int] = 42) -> str:
+    """Write `rows` data rows (a `dirty_ratio` share of them invalid) to `path`; deterministic per seed."""
+    rng = random.Random(seed)
+    products = list(PRODUCTS)
+    dates = [(FIRST_DAY + datetime.timedelta(days=d)).isoformat() for d in range(DAYS)]
+
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["date", "region", "product", "units_sold", "unit_price"])
+
+        for _ in range(rows):
+            if rng.random() < dirty_ratio:
+                writer.writerow(rng.choice(DIRTY_ROWS))
+                continue
+
+            product = rng.choice(products)
+            low, high = PRODUCTS[product]
+            writer.writerow([
+                rng.choice(dates),
+                rng.choice(REGIONS),
+                product,
+                rng.randint(1, 50),
+                f"{rng.uniform(low, high):.2f}",
+            ])
+
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic sales CSV.")
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dirty-ratio", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate_sales_csv(args.path, args.rows, args.dirty_ratio, args.seed)
+    print(f"Wrote {args.rows} rows to {args.path}")
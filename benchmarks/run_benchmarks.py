@@ -0,0 +1,144 @@
+"""
+Benchmark runner for the sales analysis and producer-consumer hot paths.
+
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --output new.json --baseline bench.json
+
+With `--baseline`, every benchmark present in both runs is compared on its
+`seconds` and the process exits with status 1 if any got slower than the
+tolerance allows.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+from typing import Dict, Any, List
+
+from benchmarks.bench_producer_consumer import bench_pipeline, bench_priority, bench_queue
+from benchmarks.bench_sales_analysis import bench_sales
+
+
+def run_all(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, Any]] = {}
+    if "sales" in args.suites:
+        results.update(bench_sales(args.data_dir, args.sizes, args.repeats))
+    if "queue" in args.suites:
+        threads = [tuple(int(n) for n in mix.split("x")) for mix in args.threads]
+        results.update(bench_queue(args.max_sizes, args.queue_items, threads, args.repeats, args.queue_impls))
+    if "priority" in args.suites:
+        results.update(bench_priority(args.max_sizes, args.priority_items, repeats=args.repeats))
+    if "pipeline" in args.suites:
+        results.update(bench_pipeline(
+            args.queue_items, batch_sizes=args.batch_sizes, repeats=args.repeats, queue_impls=args.queue_impls
+        ))
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Compare two result files benchmark by benchmark.
+
+    Status is "regression" / "improvement" when `seconds` moved by more than
+    `tolerance` (a fraction, 0.25 = 25%), otherwise "ok"; benchmarks found in
+    only one run are "new" or "missing".
+    """
+    rows = []
+    cur, base = current["results"], baseline["results"]
+
+    for name in sorted(set(cur) | set(base)):
+        if name not in base:
+            rows.append({"name": name, "status": "new", "current": cur[name]["seconds"]})
+            continue
+        if name not in cur:
+            rows.append({"name": name, "status": "missing", "baseline": base[name]["seconds"]})
+            continue
+
+        before, after = base[name]["seconds"], cur[name]["seconds"]
+        ratio = after / before if before else float("inf")
+        if ratio > 1 + tolerance:
+            status = "regression"
+        elif ratio < 1 - tolerance:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({"name": name, "status": status, "baseline": before, "current": after, "ratio": ratio})
+
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> None:
+    print(f"{'Benchmark':<72} {'Baseline':>12} {'Current':>12} {'Ratio':>7}  Status")
+    print("-" * 118)
+    for row in rows:
+        before = f"{row['baseline']:.6f}" if "baseline" in row else "-"
+        after = f"{row['current']:.6f}" if "current" in row else "-"
+        ratio = f"{row['ratio']:.2f}" if "ratio" in row else "-"
+        print(f"{row['name']:<72} {before:>12} {after:>12} {ratio:>7}  {row['status']}")
+
+
+def print_results(report: Dict[str, Any]) -> None:
+    print(f"{'Benchmark':<72} {'Seconds':>12}  Extra")
+    print("-" * 118)
+    for name, result in report["results"].items():
+        extra = ", ".join(f"{k}={v:,.1f}" for k, v in result.items() if k.endswith(("_sec", "_us")))
+        print(f"{name:<72} {result['seconds']:>12.6f}  {extra}")
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suites", nargs="+", default=["sales", "queue", "priority", "pipeline"], choices=["sales", "queue", "priority", "pipeline"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000], help="sales rows (10^4 .. 10^7)")
+    parser.add_argument("--queue-items", nargs="+", type=int, default=[10_000, 100_000])
+    parser.add_argument("--priority-items", nargs="+", type=int, default=[20_000], help="items per urgent/bulk latency round")
+    parser.add_argument("--max-sizes", nargs="+", type=int, default=[1, 10, 100, 1000])
+    parser.add_argument("--threads", nargs="+", default=["1x1", "2x2", "4x4"], help="PRODUCERSxCONSUMERS")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 64], help="run_pipeline batch sizes")
+    parser.add_argument("--queue-impls", nargs="+", default=["blocking", "ring"], choices=["blocking", "ring", "priority"], help="queue implementations (ring: 1x1 only)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "sales-benchmarks"))
+    parser.add_argument("--output", help="write results as JSON here")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    report = run_all(args)
+    print_results(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.tolerance)
+        print()
+        print_comparison(rows)
+        if any(row["status"] == "regression" for row in rows):
+            print(f"\nFAILED: regressions beyond {args.tolerance:.0%} tolerance")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
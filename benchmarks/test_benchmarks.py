@@ -0,0 +1,68 @@
+import csv
+import logging
+
+from assignment2.sales_analysis import SalesAnalysis
+from benchmarks.bench_producer_consumer import priority_round, queue_round
+from benchmarks.datagen import generate_sales_csv
+from benchmarks.run_benchmarks import compare
+
+
+# -------------------------------------------------------------------
+# 1. generator: schema, determinism, share of dirty rows
+# -------------------------------------------------------------------
+def test_generator_is_deterministic_and_loadable(tmp_path):
+    a = generate_sales_csv(str(tmp_path / "a.csv"), 500, dirty_ratio=0.1, seed=7)
+    b = generate_sales_csv(str(tmp_path / "b.csv"), 500, dirty_ratio=0.1, seed=7)
+
+    with open(a) as fa, open(b) as fb:
+        assert fa.read() == fb.read()
+
+    with open(a) as f:
+        header = next(csv.reader(f))
+    assert header == ["date", "region", "product", "units_sold", "unit_price"]
+
+    logging.disable(logging.WARNING)
+    try:
+        analysis = SalesAnalysis(a)
+    finally:
+        logging.disable(logging.NOTSET)
+    assert 400 < len(analysis.data) < 500
+
+
+# -------------------------------------------------------------------
+# 2. queue round delivers every item exactly once
+# -------------------------------------------------------------------
+def test_queue_round_collects_all_latencies():
+    elapsed, latencies = queue_round(max_size=4, items=1001, producers=3, consumers=2)
+
+    assert elapsed > 0
+    assert len(latencies) == 1001
+    assert min(latencies) >= 0
+
+
+def test_queue_round_ring_buffer_collects_all_latencies():
+    elapsed, latencies = queue_round(max_size=4, items=1001, producers=1, consumers=1, queue_impl="ring")
+
+    assert len(latencies) == 1001
+
+
+# -------------------------------------------------------------------
+# 3. baseline comparison flags regressions beyond the tolerance
+# -------------------------------------------------------------------
+def test_compare_against_baseline():
+    baseline = {"results": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}, "c": {"seconds": 1.0}, "gone": {"seconds": 1.0}}}
+    current = {"results": {"a": {"seconds": 1.1}, "b": {"seconds": 1.5}, "c": {"seconds": 0.5}, "added": {"seconds": 1.0}}}
+
+    status = {row["name"]: row["status"] for row in compare(current, baseline, tolerance=0.25)}
+
+    assert status == {"a": "ok", "b": "regression", "c": "improvement", "gone": "missing", "added": "new"}
+
+
+# -------------------------------------------------------------------
+# 4. priority round splits urgent and bulk latencies
+# -------------------------------------------------------------------
+def test_priority_round_splits_urgent_and_bulk():
+    elapsed, urgent, bulk = priority_round(max_size=8, items=500, urgent_every=10, queue_impl="priority", work=10)
+
+    assert len(urgent) == 50
+    assert len(bulk) == 450
@@ -0,0 +1,21 @@
+import timeit
+from typing import Callable, Dict, Any
+
+
+def measure(fn: Callable[[], Any], repeats: int = 3, min_time: float = 0.2) -> Dict[str, Any]:
+    """
+    Best-of-`repeats` seconds per call, timeit-style.
+
+    Fast calls are looped so timer resolution doesn't dominate: one timed
+    call estimates the cost, and `number` is scaled from it to fill about
+    `min_time`. Calls slower than `min_time` run once per repeat.
+    """
+    timer = timeit.Timer(fn)
+
+    number, elapsed = 1, timer.timeit(1)
+    if elapsed < min_time:
+        number = max(1, int(min_time / max(elapsed, 1e-9)))
+        elapsed = timer.timeit(number)
+
+    runs = [elapsed] + timer.repeat(repeat=max(repeats - 1, 0), number=number)
+    return {"seconds": min(runs) / number, "number": number, "repeats": len(runs)}